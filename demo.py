@@ -3,16 +3,28 @@
 提供完整的菜单系统，可以访问所有功能模块
 """
 
+import importlib
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
 from srv.meeting_transcriber import MeetingTranscriber
 from srv.cross_platform_asr import check_platform_compatibility
 
 
+# 支持的音频文件后缀 (小写)
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg')
+
+
 def clear_screen():
-    """清屏函数"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """清屏函数 (终端支持时直接写入 ANSI 转义序列，避免每次启动子进程)"""
+    if os.name != 'nt' and os.environ.get('TERM') and sys.stdout.isatty():
+        sys.stdout.write('\x1b[2J\x1b[H')
+        sys.stdout.flush()
+    else:
+        os.system('cls' if os.name == 'nt' else 'clear')
 
 
 def show_main_menu():
@@ -62,51 +74,23 @@ def start_meeting_transcription():
     print("2. 交互式选择 (显示所有可用模型)")
     print("3. 使用当前配置")
 
-    while True:
-        try:
-            choice = input("\n请选择模型方式 (1-3): ").strip()
-            if choice == "1":
-                whisper_model = "auto"
-                break
-            elif choice == "2":
-                whisper_model = "interactive"
-                break
-            elif choice == "3":
-                whisper_model = "auto"
-                break
-            else:
-                print("请输入 1、2 或 3")
-        except KeyboardInterrupt:
-            print("\n返回主菜单")
-            return
+    whisper_model = _prompt_choice("\n请选择模型方式 (1-3): ",
+                                   {"1": "auto", "2": "interactive", "3": "auto"})
+    if whisper_model is None:
+        return
 
     # 询问说话人分离方法
     print("\n选择说话人分离方法:")
     print("1. 自动选择 (PyAnnote优先，回退到本地)")
     print("2. PyAnnote (高质量，需要token)")
-    print("3. PyAnnote 快速模式 (长音频分段处理)")
+    print("3. PyAnnote 合并模式 (长音频合并相邻同说话人片段)")
     print("4. 本地聚类 (无需token，效果一般，速度快)")
 
-    while True:
-        try:
-            choice = input("\n请选择方法 (1-4): ").strip()
-            if choice == "1":
-                diarization_method = "auto"
-                break
-            elif choice == "2":
-                diarization_method = "pyannote"
-                break
-            elif choice == "3":
-                diarization_method = "pyannote_fast"
-                break
-            elif choice == "4":
-                diarization_method = "local"
-                break
-            else:
-                print("请输入 1、2、3 或 4")
-        except KeyboardInterrupt:
-            print("\n返回主菜单")
-            return
+    diarization_method = _prompt_choice("\n请选择方法 (1-4): ",
+                                        {"1": "auto", "2": "pyannote",
+                                         "3": "pyannote_fast", "4": "local"})
+    if diarization_method is None:
+        return
 
     # 初始化转录器
     print("\n正在初始化转录器...")
@@ -126,6 +110,31 @@ def start_meeting_transcription():
     _process_audio_files(transcriber)
 
 
+def _prompt_choice(prompt, options):
+    """
+    循环读取输入直到得到有效选项
+
+    Args:
+        prompt: 输入提示
+        options: 输入值到返回值的映射
+
+    Returns:
+        选项对应的值，用户中断时返回 None
+    """
+    keys = list(options)
+    hint = f"请输入 {'、'.join(keys[:-1])} 或 {keys[-1]}" if len(keys) > 1 else f"请输入 {keys[0]}"
+
+    while True:
+        try:
+            choice = input(prompt).strip()
+        except KeyboardInterrupt:
+            print("\n返回主菜单")
+            return None
+        if choice in options:
+            return options[choice]
+        print(hint)
+
+
 def _process_audio_files(transcriber):
     """处理音频文件"""
     input_dir = "input"
@@ -136,22 +145,16 @@ def _process_audio_files(transcriber):
         print(f"创建了 {input_dir} 文件夹")
 
     # 获取input文件夹中的所有音频文件
-    audio_extensions = ['.wav', '.mp3', '.m4a', '.flac', '.ogg']
-    audio_files = []
-
-    if os.path.exists(input_dir):
-        for file in os.listdir(input_dir):
-            if any(file.lower().endswith(ext) for ext in audio_extensions):
-                audio_files.append(os.path.join(input_dir, file))
+    basename = os.path.basename
+    with os.scandir(input_dir) as it:
+        audio_files = [entry.path for entry in it
+                       if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS)]
 
     if not audio_files:
         print(f"\n未在 {input_dir} 文件夹中找到音频文件")
         print("请将音频文件放在 input/ 文件夹下，支持的格式:")
-        print("  - WAV (.wav)")
-        print("  - MP3 (.mp3)")
-        print("  - M4A (.m4a)")
-        print("  - FLAC (.flac)")
-        print("  - OGG (.ogg)")
+        for ext in AUDIO_EXTENSIONS:
+            print(f"  - {ext[1:].upper()} ({ext})")
         input("\n按回车键返回主菜单...")
         return
 
@@ -161,7 +164,7 @@ def _process_audio_files(transcriber):
     else:
         print(f"\n在 {input_dir} 文件夹中找到 {len(audio_files)} 个音频文件:")
         for i, file in enumerate(audio_files, 1):
-            filename = os.path.basename(file)
+            filename = basename(file)
             print(f"  {i}. {filename}")
 
         while True:
@@ -193,7 +196,7 @@ def _run_transcription(transcriber, audio_file):
         demo_start_time = time.time()
 
         print(f"\n开始处理音频文件: {os.path.basename(audio_file)}")
-        print(f"开始时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"开始时间: {datetime.fromtimestamp(demo_start_time).isoformat(' ', 'seconds')}")
 
         result = transcriber.transcribe_meeting(audio_file)
 
@@ -206,7 +209,7 @@ def _run_transcription(transcriber, audio_file):
         _print_summary(result)
 
         # 保存结果
-        _save_results(result, audio_file)
+        _save_results(transcriber, result, audio_file)
 
         # 显示运行时间统计
         demo_total_time = time.time() - demo_start_time
@@ -224,27 +227,28 @@ def _run_transcription(transcriber, audio_file):
         input("\n按回车键返回主菜单...")
 
 
-def _save_results(result, audio_file):
+def _save_results(transcriber, result, audio_file):
     """保存转录结果"""
     output_dir = "output"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    join = os.path.join
     base_name = os.path.splitext(os.path.basename(audio_file))[0]
 
-    # 保存为文本格式
-    txt_file = os.path.join(output_dir, f"{base_name}_transcript.txt")
-    from srv.meeting_transcriber import MeetingTranscriber
-    transcriber = MeetingTranscriber()
-    transcriber.export_to_txt(result, txt_file)
-
-    # 保存为JSON格式
-    json_file = os.path.join(output_dir, f"{base_name}_transcript.json")
-    transcriber.export_to_json(result, json_file)
+    txt_file = join(output_dir, f"{base_name}_transcript.txt")
+    json_file = join(output_dir, f"{base_name}_transcript.json")
+    csv_file = join(output_dir, f"{base_name}_transcript.csv")
 
-    # 保存为CSV格式
-    csv_file = os.path.join(output_dir, f"{base_name}_transcript.csv")
-    transcriber.export_to_csv(result, csv_file)
+    # 三种格式相互独立，并行写入以重叠磁盘 I/O
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(transcriber.export_to_txt, result, txt_file),
+            executor.submit(transcriber.export_to_json, result, json_file),
+            executor.submit(transcriber.export_to_csv, result, csv_file),
+        ]
+        for future in futures:
+            future.result()
 
     print(f"\n结果已保存到 {output_dir}/ 文件夹:")
     print(f"  文本格式: {txt_file}")
@@ -256,54 +260,69 @@ def _print_summary(result):
     """打印转录结果摘要"""
     info = result["meeting_info"]
 
-    print(f"\n会议转录摘要:")
-    print("-" * 30)
-    print(f"总时长: {_format_time(info['total_duration'])}")
-    print(f"说话人数: {info['total_speakers']}")
-    print(f"语言: {info['language']}")
-    print(f"转录片段数: {len(result['timeline'])}")
+    out = [
+        "\n会议转录摘要:",
+        "-" * 30,
+        f"总时长: {_format_time(info['total_duration'])}",
+        f"说话人数: {info['total_speakers']}",
+        f"语言: {info['language']}",
+        f"转录片段数: {len(result['timeline'])}",
+    ]
 
     if "processing_time" in result:
         proc_time = result["processing_time"]
-        print(f"处理耗时: {proc_time['total']:.1f}秒")
         efficiency_ratio = info['total_duration'] / proc_time['total']
-        print(f"处理效率: {efficiency_ratio:.1f}x 实时")
-
-    print(f"\n说话人统计:")
-    for speaker, stats in result["speaker_statistics"].items():
-        duration_str = _format_time(stats["total_duration"])
-        percentage = (stats["total_duration"] / info["total_duration"]) * 100
-        print(f"  {speaker}: {duration_str} ({percentage:.1f}%)")
+        out.append(f"处理耗时: {proc_time['total']:.1f}秒")
+        out.append(f"处理效率: {efficiency_ratio:.1f}x 实时")
+
+    out.append("\n说话人统计:")
+    speaker_stats = result["speaker_statistics"]
+    speakers = list(speaker_stats)
+    durations = np.fromiter((speaker_stats[s]["total_duration"] for s in speakers),
+                            dtype=np.float64, count=len(speakers))
+    # 没有转录内容时总时长为 0，占比按 0% 显示
+    total_duration = info["total_duration"]
+    if total_duration > 0:
+        percentages = durations * (100.0 / total_duration)
+    else:
+        percentages = np.zeros_like(durations)
+    for speaker, duration, percentage in zip(speakers, durations, percentages):
+        out.append(f"  {speaker}: {_format_time(duration)} ({percentage:.1f}%)")
 
-    print(f"\n部分转录内容预览:")
+    out.append("\n部分转录内容预览:")
     for item in result["timeline"][:3]:
-        print(f"  [{item['timestamp']}] {item['speaker']}: {item['text'][:50]}...")
+        out.append(f"  [{item['timestamp']}] {item['speaker']}: {item['text'][:50]}...")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def _print_timing_stats(result, demo_start_time, demo_total_time):
     """打印时间统计"""
-    import time
-
-    print(f"\n运行时长统计")
-    print("=" * 30)
-    print(f"开始时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(demo_start_time))}")
-    print(f"结束时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"总运行时长: {demo_total_time:.1f}秒 ({demo_total_time/60:.1f}分钟)")
+    out = [
+        "\n运行时长统计",
+        "=" * 30,
+        f"开始时间: {datetime.fromtimestamp(demo_start_time).isoformat(' ', 'seconds')}",
+        f"结束时间: {datetime.now().isoformat(' ', 'seconds')}",
+        f"总运行时长: {demo_total_time:.1f}秒 ({demo_total_time/60:.1f}分钟)",
+    ]
 
     if "processing_time" in result:
         proc_time = result["processing_time"]
-        print(f"\n处理时间详情:")
-        print(f"语音转文字: {proc_time['asr']:.1f}秒")
-        print(f"说话人分离: {proc_time['diarization']:.1f}秒")
-        print(f"对齐处理: {proc_time['alignment']:.1f}秒")
-        print(f"生成纪要: {proc_time['summary']:.1f}秒")
-
         audio_duration = result["meeting_info"]["total_duration"]
         efficiency_ratio = audio_duration / proc_time['total']
-        print(f"\n处理效率:")
-        print(f"音频时长: {_format_time(audio_duration)}")
-        print(f"处理时间: {proc_time['total']:.1f}秒")
-        print(f"效率比: {efficiency_ratio:.1f}x (处理速度是实时的{efficiency_ratio:.1f}倍)")
+        out.extend([
+            "\n处理时间详情:",
+            f"语音转文字: {proc_time['asr']:.1f}秒",
+            f"说话人分离: {proc_time['diarization']:.1f}秒",
+            f"对齐处理: {proc_time['alignment']:.1f}秒",
+            f"生成纪要: {proc_time['summary']:.1f}秒",
+            "\n处理效率:",
+            f"音频时长: {_format_time(audio_duration)}",
+            f"处理时间: {proc_time['total']:.1f}秒",
+            f"效率比: {efficiency_ratio:.1f}x (处理速度是实时的{efficiency_ratio:.1f}倍)",
+        ])
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def _format_time(seconds):
@@ -319,7 +338,7 @@ def _format_time(seconds):
 
 
 def run_script(script_name, description):
-    """运行指定的Python脚本"""
+    """运行指定的Python脚本 (优先在当前进程中调用其 main 函数)"""
     clear_screen()
     print(f"启动 {description}...")
     print("-" * 40)
@@ -330,13 +349,22 @@ def run_script(script_name, description):
         return
 
     try:
-        # 使用当前Python解释器运行脚本
-        result = subprocess.run([sys.executable, script_name],
-                              capture_output=False,
-                              text=True)
-
-        if result.returncode != 0:
-            print(f"\n脚本执行完成，返回码: {result.returncode}")
+        entry = _load_script_main(script_name)
+        if entry is not None:
+            # 在当前进程中运行，避免重复启动解释器和重新导入依赖
+            try:
+                entry()
+            except SystemExit as e:
+                if e.code not in (None, 0):
+                    print(f"\n脚本执行完成，返回码: {e.code}")
+        else:
+            # 脚本没有提供 main 函数时，使用当前Python解释器运行脚本
+            result = subprocess.run([sys.executable, script_name],
+                                  capture_output=False,
+                                  text=True)
+
+            if result.returncode != 0:
+                print(f"\n脚本执行完成，返回码: {result.returncode}")
 
     except KeyboardInterrupt:
         print("\n\n脚本被用户中断")
@@ -346,6 +374,14 @@ def run_script(script_name, description):
     input("\n按回车键返回主菜单...")
 
 
+def _load_script_main(script_name):
+    """导入脚本对应的模块并返回其 main 函数 (模块由 importlib 缓存)"""
+    module_name = os.path.splitext(os.path.normpath(script_name))[0].replace(os.sep, ".")
+    module = importlib.import_module(module_name)
+    entry = getattr(module, "main", None)
+    return entry if callable(entry) else None
+
+
 def show_platform_compatibility():
     """显示平台兼容性检查"""
     clear_screen()
@@ -363,36 +399,42 @@ def show_usage_guide():
     guide_file = "MODEL_CONFIG_GUIDE.md"
 
     clear_screen()
-    print("=" * 50)
-    print("         使用指南")
-    print("=" * 50)
+    out = [
+        "=" * 50,
+        "         使用指南",
+        "=" * 50,
+    ]
 
     if os.path.exists(guide_file):
-        print(f"详细指南请查看: {guide_file}")
-        print("\n快速指南:")
-        print()
-        print("1. 基本使用:")
-        print("   - 将音频文件放入 input/ 文件夹")
-        print("   - 选择菜单选项 1 开始转录")
-        print("   - 结果保存在 output/ 文件夹")
-        print()
-        print("2. 配置管理:")
-        print("   - 选择菜单选项 3 管理 Whisper 模型")
-        print("     > 选择模型管理器中的选项 5 添加自定义模型")
-        print("   - 选择菜单选项 4 设置 PyAnnote")
-        print("   - 选择菜单选项 5 配置 HuggingFace Token")
-        print()
-        print("3. 测试工具:")
-        print("   - 选择菜单选项 6 测试 MLX Whisper")
-        print("   - 选择菜单选项 2 检查平台兼容性")
-        print()
-        print("4. 文件结构:")
-        print("   - input/     - 放置音频文件")
-        print("   - output/    - 转录结果输出")
-        print("   - models_config.json - 模型配置")
-        print("   - user_config.json   - 用户偏好")
+        out.extend([
+            f"详细指南请查看: {guide_file}",
+            "\n快速指南:",
+            "",
+            "1. 基本使用:",
+            "   - 将音频文件放入 input/ 文件夹",
+            "   - 选择菜单选项 1 开始转录",
+            "   - 结果保存在 output/ 文件夹",
+            "",
+            "2. 配置管理:",
+            "   - 选择菜单选项 3 管理 Whisper 模型",
+            "     > 选择模型管理器中的选项 5 添加自定义模型",
+            "   - 选择菜单选项 4 设置 PyAnnote",
+            "   - 选择菜单选项 5 配置 HuggingFace Token",
+            "",
+            "3. 测试工具:",
+            "   - 选择菜单选项 6 测试 MLX Whisper",
+            "   - 选择菜单选项 2 检查平台兼容性",
+            "",
+            "4. 文件结构:",
+            "   - input/     - 放置音频文件",
+            "   - output/    - 转录结果输出",
+            "   - models_config.json - 模型配置",
+            "   - user_config.json   - 用户偏好",
+        ])
     else:
-        print(f"指南文件 {guide_file} 不存在")
+        out.append(f"指南文件 {guide_file} 不存在")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
     input("\n按回车键返回主菜单...")
 
@@ -400,36 +442,38 @@ def show_usage_guide():
 def show_about():
     """显示关于信息"""
     clear_screen()
-    print("=" * 50)
-    print("         关于本程序")
-    print("=" * 50)
-    print()
-    print("语音转录系统")
-    print("版本: 2.0")
-    print()
-    print("主要功能:")
-    print("  • 本地化语音转录 (支持 Whisper)")
-    print("  • 智能说话人分离 (PyAnnote + 本地聚类)")
-    print("  • 跨平台支持 (Apple Silicon 优化)")
-    print("  • 灵活的配置管理")
-    print("  • 详细的处理统计")
-    print()
-    print("支持的模型:")
-    print("  • MLX Whisper (Apple Silicon)")
-    print("  • OpenAI Whisper (跨平台)")
-    print("  • PyAnnote 说话人分离")
-    print("  • 本地聚类算法")
-    print()
-    print("支持的格式:")
-    print("  • 输入: WAV, MP3, M4A, FLAC, OGG")
-    print("  • 输出: TXT, JSON, CSV")
-    print()
-    print("相关技术:")
-    print("  • MLX (Apple 机器学习框架)")
-    print("  • OpenAI Whisper")
-    print("  • PyAnnote Audio")
-    print("  • scikit-learn")
-    print("  • HuggingFace Transformers")
+    sys.stdout.write("\n".join([
+        "=" * 50,
+        "         关于本程序",
+        "=" * 50,
+        "",
+        "语音转录系统",
+        "版本: 2.0",
+        "",
+        "主要功能:",
+        "  • 本地化语音转录 (支持 Whisper)",
+        "  • 智能说话人分离 (PyAnnote + 本地聚类)",
+        "  • 跨平台支持 (Apple Silicon 优化)",
+        "  • 灵活的配置管理",
+        "  • 详细的处理统计",
+        "",
+        "支持的模型:",
+        "  • MLX Whisper (Apple Silicon)",
+        "  • OpenAI Whisper (跨平台)",
+        "  • PyAnnote 说话人分离",
+        "  • 本地聚类算法",
+        "",
+        "支持的格式:",
+        f"  • 输入: {', '.join(ext[1:].upper() for ext in AUDIO_EXTENSIONS)}",
+        "  • 输出: TXT, JSON, CSV",
+        "",
+        "相关技术:",
+        "  • MLX (Apple 机器学习框架)",
+        "  • OpenAI Whisper",
+        "  • PyAnnote Audio",
+        "  • scikit-learn",
+        "  • HuggingFace Transformers",
+    ]) + "\n")
 
     input("\n按回车键返回主菜单...")
 
@@ -3,9 +3,138 @@
 管理模型配置、用户偏好设置等
 """
 
+import copy
 import json
 import os
-from typing import Dict, List, Optional, Any
+import re
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Any, Tuple
+
+# 优先使用 orjson (C 实现，解析/序列化更快)，不可用时回退到标准库
+try:
+    import orjson
+
+    def _json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+except ImportError:
+    def _json_loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+# 模型名称中的尺寸关键字
+_SPEED_MODEL_RE = re.compile(r'tiny|base|small')
+_MID_SIZE_MODEL_RE = re.compile(r'small|medium')
+
+# 已解析的配置缓存: 绝对路径 -> (mtime_ns, 文件大小, 配置字典)
+_CONFIG_CACHE: Dict[str, Tuple[int, int, Dict]] = {}
+
+# 最近一次写入的内容: 绝对路径 -> (mtime_ns, 文件大小, 序列化字节)
+_LAST_WRITTEN: Dict[str, Tuple[int, int, bytes]] = {}
+
+
+def _read_json_cached(path: str) -> Dict:
+    """读取 JSON 文件，文件未变化时直接返回缓存结果的副本"""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    cached = _CONFIG_CACHE.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return copy.deepcopy(cached[2])
+
+    with open(path, 'rb') as f:
+        data = _json_loads(f.read())
+    _CONFIG_CACHE[key] = (st.st_mtime_ns, st.st_size, copy.deepcopy(data))
+    return data
+
+
+def write_json_file(path: str, data: Dict):
+    """
+    以 UTF-8、缩进 2 的格式保存 JSON 文件 (优先使用 orjson)
+
+    先写入临时文件再原子替换，避免中断时留下不完整的文件；
+    若内容与上次写入相同且文件未被外部修改，则跳过写入
+    """
+    key = os.path.abspath(path)
+    payload = _json_dumps(data)
+
+    last = _LAST_WRITTEN.get(key)
+    if last is not None and last[2] == payload:
+        try:
+            st = os.stat(path)
+            if (st.st_mtime_ns, st.st_size) == last[:2]:
+                return
+        except OSError:
+            pass
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    st = os.stat(path)
+    _LAST_WRITTEN[key] = (st.st_mtime_ns, st.st_size, payload)
+    _update_json_cache(path, data)
+
+
+def _update_json_cache(path: str, data: Dict):
+    """写入文件后刷新缓存条目"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        _CONFIG_CACHE.pop(os.path.abspath(path), None)
+        return
+    _CONFIG_CACHE[os.path.abspath(path)] = (st.st_mtime_ns, st.st_size, copy.deepcopy(data))
+
+
+@dataclass(frozen=True)
+class WhisperEngineConfig:
+    """单个 Whisper 引擎的只读模型配置"""
+    __slots__ = ("available", "default", "descriptions")
+
+    available: Tuple[str, ...]
+    default: str
+    descriptions: Mapping[str, str]
+
+
+_EMPTY_ENGINE_CONFIG = WhisperEngineConfig((), "", MappingProxyType({}))
+
+
+def _build_engine_configs(raw: Dict) -> Dict[str, WhisperEngineConfig]:
+    """校验并规范化 whisper_models 配置段，忽略格式不正确的条目"""
+    engines = {}
+    whisper_models = raw.get("whisper_models", {})
+    if not isinstance(whisper_models, dict):
+        print("配置文件中的 whisper_models 格式无效，已忽略")
+        return engines
+
+    for engine, section in whisper_models.items():
+        if not isinstance(section, dict):
+            print(f"配置文件中的 {engine} 引擎配置格式无效，已忽略")
+            continue
+
+        available = section.get("available_models", [])
+        descriptions = section.get("descriptions", {})
+        engines[engine] = WhisperEngineConfig(
+            available=tuple(str(m) for m in available) if isinstance(available, list) else (),
+            default=str(section.get("default", "")),
+            descriptions=MappingProxyType(
+                {str(k): str(v) for k, v in descriptions.items()} if isinstance(descriptions, dict) else {}
+            ),
+        )
+    return engines
 
 
 class ConfigManager:
@@ -19,16 +148,53 @@ class ConfigManager:
             config_file: 配置文件路径
         """
         self.config_file = config_file
-        self.config = self._load_config()
+        self._config = None
+        self._engine_configs = None
         self.user_config_file = "user_config.json"
-        self.user_config = self._load_user_config()
+        self._user_config = None
+        self._merged_prefs = None
+
+    @property
+    def config(self) -> Dict:
+        """主配置 (首次访问时才从磁盘加载)"""
+        if self._config is None:
+            self._config = self._load_config()
+        return self._config
+
+    @config.setter
+    def config(self, value: Dict):
+        self._config = value
+        self._engine_configs = None
+        self._merged_prefs = None
+
+    def reload(self):
+        """丢弃内存中的配置，下次访问时重新读取 (文件未变化时命中解析缓存)"""
+        self.config = None
+        self.user_config = None
+
+    def _engine_config(self, engine: str) -> WhisperEngineConfig:
+        """获取规范化后的引擎配置 (按需构建，config 重新赋值时失效)"""
+        if self._engine_configs is None:
+            self._engine_configs = _build_engine_configs(self.config)
+        return self._engine_configs.get(engine, _EMPTY_ENGINE_CONFIG)
+
+    @property
+    def user_config(self) -> Dict:
+        """用户配置 (首次访问时才从磁盘加载)"""
+        if self._user_config is None:
+            self._user_config = self._load_user_config()
+        return self._user_config
+
+    @user_config.setter
+    def user_config(self, value: Dict):
+        self._user_config = value
+        self._merged_prefs = None
 
     def _load_config(self) -> Dict:
         """加载主配置文件"""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return _read_json_cached(self.config_file)
             else:
                 print(f"配置文件 {self.config_file} 不存在，使用默认配置")
                 return self._get_default_config()
@@ -40,8 +206,7 @@ class ConfigManager:
         """加载用户自定义配置"""
         try:
             if os.path.exists(self.user_config_file):
-                with open(self.user_config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return _read_json_cached(self.user_config_file)
         except Exception as e:
             print(f"加载用户配置失败: {e}")
         return {}
@@ -61,7 +226,7 @@ class ConfigManager:
             }
         }
 
-    def get_available_whisper_models(self, engine: str) -> List[str]:
+    def get_available_whisper_models(self, engine: str) -> Tuple[str, ...]:
         """
         获取指定引擎的可用模型列表
 
@@ -69,9 +234,9 @@ class ConfigManager:
             engine: 'mlx' 或 'openai'
 
         Returns:
-            模型列表
+            模型列表 (只读元组)
         """
-        return self.config.get("whisper_models", {}).get(engine, {}).get("available_models", [])
+        return self._engine_config(engine).available
 
     def get_default_whisper_model(self, engine: str) -> str:
         """
@@ -89,7 +254,7 @@ class ConfigManager:
             return user_model
 
         # 返回系统默认
-        return self.config.get("whisper_models", {}).get(engine, {}).get("default", "")
+        return self._engine_config(engine).default
 
     def get_model_description(self, engine: str, model: str) -> str:
         """
@@ -102,8 +267,7 @@ class ConfigManager:
         Returns:
             模型描述
         """
-        descriptions = self.config.get("whisper_models", {}).get(engine, {}).get("descriptions", {})
-        return descriptions.get(model, "无描述")
+        return self._engine_config(engine).descriptions.get(model, "无描述")
 
     def set_preferred_model(self, engine: str, model: str):
         """
@@ -117,6 +281,7 @@ class ConfigManager:
             self.user_config["preferred_models"] = {}
 
         self.user_config["preferred_models"][engine] = model
+        self._merged_prefs = None
         self._save_user_config()
         print(f"已设置 {engine} 引擎的偏好模型为: {model}")
 
@@ -132,11 +297,8 @@ class ConfigManager:
             是否成功移除
         """
         try:
-            import json
-
             # 读取当前配置
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                current_config = json.load(f)
+            current_config = _read_json_cached(self.config_file)
 
             # 检查模型是否存在
             models = current_config.get("whisper_models", {}).get(engine, {}).get("available_models", [])
@@ -151,8 +313,7 @@ class ConfigManager:
                 del current_config["whisper_models"][engine]["descriptions"][model]
 
             # 保存配置文件
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(current_config, f, ensure_ascii=False, indent=2)
+            write_json_file(self.config_file, current_config)
 
             # 重新加载配置
             self.config = current_config
@@ -165,9 +326,9 @@ class ConfigManager:
 
     def _save_user_config(self):
         """保存用户配置"""
+        self._merged_prefs = None
         try:
-            with open(self.user_config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.user_config, f, ensure_ascii=False, indent=2)
+            write_json_file(self.user_config_file, self.user_config)
         except Exception as e:
             print(f"保存用户配置失败: {e}")
 
@@ -189,9 +350,12 @@ class ConfigManager:
         print(f"\n{engine.upper()} Whisper 可用模型:")
         print("-" * 50)
 
+        descriptions = self._engine_config(engine).descriptions
+        default_model = self.get_default_whisper_model(engine)
+
         for i, model in enumerate(models, 1):
-            description = self.get_model_description(engine, model)
-            is_default = model == self.get_default_whisper_model(engine)
+            description = descriptions.get(model, "无描述")
+            is_default = model == default_model
             default_mark = " [当前默认]" if is_default else ""
             print(f"{i}. {model}{default_mark}")
             print(f"   {description}")
@@ -201,7 +365,7 @@ class ConfigManager:
             choice = input(f"请选择模型 (1-{len(models)}, 回车使用当前默认): ").strip()
 
             if not choice:
-                return self.get_default_whisper_model(engine)
+                return default_model
 
             choice_idx = int(choice) - 1
             if 0 <= choice_idx < len(models):
@@ -226,13 +390,17 @@ class ConfigManager:
         return self.config.get("diarization_models", {}).get("pyannote", {})
 
     def get_user_preferences(self) -> Dict[str, Any]:
-        """获取用户偏好设置"""
+        """获取用户偏好设置 (合并结果会被缓存，配置变更时失效)"""
+        if self._merged_prefs is not None:
+            return self._merged_prefs
+
         default_prefs = self.config.get("user_preferences", {})
         user_prefs = self.user_config.get("user_preferences", {})
 
         # 合并配置，用户配置优先
         merged_prefs = default_prefs.copy()
         merged_prefs.update(user_prefs)
+        self._merged_prefs = merged_prefs
         return merged_prefs
 
     def should_auto_select_model(self) -> bool:
@@ -259,16 +427,18 @@ class ConfigManager:
         # 根据偏好选择
         if prefs.get("prefer_speed_over_accuracy", False):
             # 优先速度，选择较小模型
+            is_fast = _SPEED_MODEL_RE.search
             for model in models:
-                if any(size in model for size in ["tiny", "base", "small"]):
+                if is_fast(model):
                     return model
 
         # 根据音频时长推荐
         if audio_duration:
             if audio_duration > 3600:  # 超过1小时
                 print("检测到长音频，推荐使用较小模型以节省时间")
+                is_mid_size = _MID_SIZE_MODEL_RE.search
                 for model in models:
-                    if any(size in model for size in ["small", "medium"]):
+                    if is_mid_size(model):
                         return model
 
         # 默认返回最佳平衡的模型
@@ -276,22 +446,39 @@ class ConfigManager:
 
     def show_config_summary(self):
         """显示配置摘要"""
-        print("\n当前模型配置:")
-        print("=" * 50)
+        out = ["\n当前模型配置:", "=" * 50]
 
         for engine in ["mlx", "openai"]:
             default_model = self.get_default_whisper_model(engine)
             models_count = len(self.get_available_whisper_models(engine))
-            print(f"{engine.upper()} Whisper:")
-            print(f"  默认模型: {default_model}")
-            print(f"  可用模型: {models_count} 个")
-            print()
+            out.extend([
+                f"{engine.upper()} Whisper:",
+                f"  默认模型: {default_model}",
+                f"  可用模型: {models_count} 个",
+                "",
+            ])
 
         prefs = self.get_user_preferences()
-        print("用户偏好:")
-        print(f"  自动选择模型: {prefs.get('auto_select_best_model', True)}")
-        print(f"  偏好速度: {prefs.get('prefer_speed_over_accuracy', False)}")
-        print(f"  最大模型大小: {prefs.get('max_model_size_gb', 2.0)} GB")
+        out.extend([
+            "用户偏好:",
+            f"  自动选择模型: {prefs.get('auto_select_best_model', True)}",
+            f"  偏好速度: {prefs.get('prefer_speed_over_accuracy', False)}",
+            f"  最大模型大小: {prefs.get('max_model_size_gb', 2.0)} GB",
+        ])
+
+        sys.stdout.write("\n".join(out) + "\n")
+
+
+# 进程内共享的默认配置管理器
+_SHARED_CONFIG: Optional[ConfigManager] = None
+
+
+def get_shared_config() -> ConfigManager:
+    """获取进程内共享的配置管理器 (首次调用时创建)"""
+    global _SHARED_CONFIG
+    if _SHARED_CONFIG is None:
+        _SHARED_CONFIG = ConfigManager()
+    return _SHARED_CONFIG
 
 
 def main():
@@ -6,12 +6,14 @@
 
 import platform
 import sys
+from functools import lru_cache
 from typing import Dict, Optional
-from .config_manager import ConfigManager
+from .config_manager import get_shared_config
 
 
+@lru_cache(maxsize=1)
 def get_platform_info():
-    """获取平台信息"""
+    """获取平台信息 (进程内不会变化，只探测一次)"""
     system = platform.system()
     machine = platform.machine()
 
@@ -42,11 +44,13 @@ class CrossPlatformASR:
             model_size: 模型大小 ("auto" 使用配置, "interactive" 交互选择, 或具体模型名)
             interactive: 是否启用交互式模型选择
         """
-        self.config_manager = ConfigManager()
+        self.config_manager = get_shared_config()
         self.platform_info = get_platform_info()
         self.asr_engine = None
         self.model_size = model_size
         self.interactive = interactive
+        self._fw = False  # OpenAI 引擎是否由 faster-whisper 提供
+        self._cuda = False  # openai-whisper 模型是否在 CUDA 上
         self._initialize_engine()
 
     def _initialize_engine(self):
@@ -71,6 +75,9 @@ class CrossPlatformASR:
         except ImportError:
             raise RuntimeError("MLX Whisper 不可用。请确保在 Apple Silicon Mac 上运行，并已安装 mlx-whisper")
 
+        # 保存模块引用，转录时直接使用
+        self._mlx_whisper = mlx_whisper
+
         try:
             self.asr_engine = "mlx"
 
@@ -89,49 +96,102 @@ class CrossPlatformASR:
             model_desc = self.config_manager.get_model_description("mlx", model)
             print(f" 使用 MLX Whisper: {model}")
             print(f" 模型描述: {model_desc}")
+            self._load_mlx_model(model)
 
         except ImportError:
             print(" MLX Whisper 不可用，回退到 OpenAI Whisper")
             self.engine_type = "openai"
             self._init_openai_whisper()
 
+    def _load_mlx_model(self, model: str):
+        """
+        预先把 MLX 模型权重加载到内存
+
+        mlx_whisper.transcribe 按模型路径缓存已加载的模型 (ModelHolder)，
+        这里提前填充该缓存，首次转录时无需再解析和读取权重
+        """
+        try:
+            import mlx.core as mx
+            from mlx_whisper.transcribe import ModelHolder
+
+            # 与 transcribe 默认的 fp16 精度一致，才能命中缓存
+            ModelHolder.get_model(model, mx.float16)
+        except Exception as e:
+            print(f" MLX 模型预加载失败，将在首次转录时加载: {e}")
+
     def _init_openai_whisper(self):
         """初始化 OpenAI Whisper (跨平台)"""
-        try:
-            import whisper
-            self.asr_engine = "openai"
+        self.asr_engine = "openai"
 
-            # 根据模式选择模型
-            if self.model_size == "interactive" or self.interactive:
-                model = self.config_manager.list_models_interactive("openai")
-                if not model:
-                    model = self.config_manager.get_default_whisper_model("openai")
-            elif self.model_size == "auto":
+        # 根据模式选择模型
+        if self.model_size == "interactive" or self.interactive:
+            model = self.config_manager.list_models_interactive("openai")
+            if not model:
                 model = self.config_manager.get_default_whisper_model("openai")
-            else:
-                # 使用指定的模型
-                model = self.model_size
+        elif self.model_size == "auto":
+            model = self.config_manager.get_default_whisper_model("openai")
+        else:
+            # 使用指定的模型
+            model = self.model_size
 
-            print(f" 正在加载 OpenAI Whisper 模型: {model}")
-            model_desc = self.config_manager.get_model_description("openai", model)
-            print(f" 模型描述: {model_desc}")
+        print(f" 正在加载 OpenAI Whisper 模型: {model}")
+        model_desc = self.config_manager.get_model_description("openai", model)
+        print(f" 模型描述: {model_desc}")
+
+        self._load_openai_model(model)
+        print(f" OpenAI Whisper 模型加载完成")
+
+    def _load_openai_model(self, model: str):
+        """
+        加载 Whisper 模型，优先使用 faster-whisper (CTranslate2 int8 量化)
+
+        faster-whisper 未安装或无法加载该模型 (如本地 .pt 文件) 时回退到 openai-whisper
+        """
+        try:
+            from faster_whisper import WhisperModel
+            import ctranslate2
+        except ImportError:
+            WhisperModel = None
+
+        if WhisperModel is not None:
+            if ctranslate2.get_cuda_device_count() > 0:
+                device, compute_type = "cuda", "int8_float16"
+            else:
+                device, compute_type = "cpu", "int8"
 
-            self.model = whisper.load_model(model)
-            self.model_name = model
-            print(f" OpenAI Whisper 模型加载完成")
+            try:
+                self.model = WhisperModel(model, device=device, compute_type=compute_type)
+                self.model_name = model
+                self._fw = True
+                print(f" 使用 faster-whisper ({device}, {compute_type})")
+                return
+            except Exception as e:
+                print(f" faster-whisper 加载失败，回退到 openai-whisper: {e}")
 
+        try:
+            import whisper
         except ImportError:
             raise ImportError(
-                "需要安装 openai-whisper。请运行: pip install openai-whisper"
+                "需要安装 openai-whisper。请运行: pip install openai-whisper (或 pip install faster-whisper)"
             )
 
-    def transcribe_with_timestamps(self, audio_file: str, language: str = None) -> Dict:
+        import torch
+
+        # 权重保持 fp32 (whisper 的 LayerNorm 以 fp32 计算)，CUDA 上由 transcribe(fp16=True) 做半精度推理
+        self._cuda = torch.cuda.is_available()
+        self.model = whisper.load_model(model, device="cuda" if self._cuda else "cpu")
+        self.model_name = model
+        self._fw = False
+
+    def transcribe_with_timestamps(self, audio_file: str, language: str = None,
+                                   word_timestamps: bool = False) -> Dict:
         """
         转录音频并返回带时间戳的结果
 
         Args:
             audio_file: 音频文件路径
             language: 语言代码
+            word_timestamps: 是否计算词级时间戳 (需要额外对齐，较慢)
 
         Returns:
             转录结果字典
@@ -141,66 +201,96 @@ class CrossPlatformASR:
 
         try:
             if self.asr_engine == "mlx":
-                return self._transcribe_with_mlx(audio_file, language)
+                return self._transcribe_with_mlx(audio_file, language, word_timestamps)
             else:
-                return self._transcribe_with_openai(audio_file, language)
+                return self._transcribe_with_openai(audio_file, language, word_timestamps)
         except Exception as e:
             print(f"转录失败: {str(e)}")
             return {"segments": [], "text": "", "error": str(e)}
 
-    def _transcribe_with_mlx(self, audio_file: str, language: str = None) -> Dict:
+    def _transcribe_with_mlx(self, audio_file: str, language: str = None,
+                             word_timestamps: bool = False) -> Dict:
         """使用 MLX Whisper 转录"""
-        try:
-            import mlx_whisper
-        except ImportError:
-            raise RuntimeError("MLX Whisper 不可用。请确保在 Apple Silicon Mac 上运行，并已安装 mlx-whisper")
-
-        result = mlx_whisper.transcribe(
+        result = self._mlx_whisper.transcribe(
             audio_file,
             path_or_hf_repo=self.model_path,
-            word_timestamps=True,
+            word_timestamps=word_timestamps,
             language=language,
             verbose=True
         )
 
         return self._format_result(result, "mlx")
 
-    def _transcribe_with_openai(self, audio_file: str, language: str = None) -> Dict:
+    def _transcribe_with_openai(self, audio_file: str, language: str = None,
+                                word_timestamps: bool = False) -> Dict:
         """使用 OpenAI Whisper 转录"""
+        if self._fw:
+            result = self._transcribe_with_faster_whisper(audio_file, language, word_timestamps)
+            return self._format_result(result, "openai")
+
+        import torch
+
         options = {
-            "word_timestamps": True,
-            "verbose": True
+            "word_timestamps": word_timestamps,
+            "verbose": True,
+            "fp16": self._cuda
         }
 
         if language:
             options["language"] = language
 
-        result = self.model.transcribe(audio_file, **options)
+        with torch.inference_mode():
+            result = self.model.transcribe(audio_file, **options)
         return self._format_result(result, "openai")
 
+    def _transcribe_with_faster_whisper(self, audio_file: str, language: str = None,
+                                        word_timestamps: bool = False) -> Dict:
+        """使用 faster-whisper 转录，结果整理为与 openai-whisper 相同的结构"""
+        segments_iter, info = self.model.transcribe(
+            audio_file,
+            word_timestamps=word_timestamps,
+            language=language,
+            vad_filter=True
+        )
+
+        segments = []
+        for seg in segments_iter:
+            print(f"[{seg.start:.2f} --> {seg.end:.2f}] {seg.text}")
+            segments.append({
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "words": [
+                    {"word": w.word, "start": w.start, "end": w.end}
+                    for w in (seg.words or [])
+                ]
+            })
+
+        return {
+            "segments": segments,
+            "text": "".join(seg["text"] for seg in segments),
+            "language": info.language
+        }
+
     def _format_result(self, raw_result: Dict, engine: str) -> Dict:
         """格式化转录结果"""
-        formatted_segments = []
-
-        segments = raw_result.get("segments", [])
-        for segment in segments:
-            formatted_segment = {
+        formatted_segments = [
+            {
                 "start": segment.get("start", 0),
                 "end": segment.get("end", 0),
                 "text": segment.get("text", "").strip(),
-                "words": []
-            }
-
-            # 处理词级时间戳
-            if "words" in segment:
-                for word in segment["words"]:
-                    formatted_segment["words"].append({
+                # 处理词级时间戳
+                "words": [
+                    {
                         "word": word.get("word", "").strip(),
                         "start": word.get("start", 0),
                         "end": word.get("end", 0)
-                    })
-
-            formatted_segments.append(formatted_segment)
+                    }
+                    for word in segment.get("words") or ()
+                ]
+            }
+            for segment in raw_result.get("segments", [])
+        ]
 
         return {
             "segments": formatted_segments,
@@ -209,9 +299,14 @@ class CrossPlatformASR:
             "engine": engine
         }
 
+    @property
+    def current_model(self) -> str:
+        """当前使用的模型名称"""
+        return getattr(self, 'model_path', getattr(self, 'model_name', self.model_size))
+
     def get_engine_info(self) -> Dict:
         """获取当前引擎信息"""
-        current_model = getattr(self, 'model_path', getattr(self, 'model_name', self.model_size))
+        current_model = self.current_model
         return {
             "platform": self.platform_info,
             "engine": self.asr_engine,
@@ -227,10 +322,11 @@ class CrossPlatformASR:
         print("-" * 50)
 
         models = self.config_manager.get_available_whisper_models(self.asr_engine)
-        current_model = getattr(self, 'model_path', getattr(self, 'model_name', self.model_size))
+        current_model = self.current_model
+        get_description = self.config_manager.get_model_description
 
         for model in models:
-            description = self.config_manager.get_model_description(self.asr_engine, model)
+            description = get_description(self.asr_engine, model)
             is_current = model == current_model
             current_mark = " [当前使用]" if is_current else ""
             print(f"  • {model}{current_mark}")
@@ -242,17 +338,20 @@ class CrossPlatformASR:
         print(f"\n当前使用: {self.asr_engine.upper()} Whisper")
         selected_model = self.config_manager.list_models_interactive(self.asr_engine)
 
+        if selected_model and selected_model == self.current_model:
+            print(f"\n已在使用模型: {selected_model}")
+            return True
+
         if selected_model:
             print(f"\n正在切换到模型: {selected_model}")
             try:
                 if self.asr_engine == "mlx":
                     self.model_path = selected_model
+                    self._load_mlx_model(selected_model)
                     print(f" MLX 模型路径已更新: {selected_model}")
                 else:
-                    import whisper
                     print(f" 正在重新加载 OpenAI Whisper 模型...")
-                    self.model = whisper.load_model(selected_model)
-                    self.model_name = selected_model
+                    self._load_openai_model(selected_model)
                     print(f" OpenAI Whisper 模型重新加载完成")
 
                 print(f" 模型切换成功!")
@@ -267,7 +366,7 @@ class CrossPlatformASR:
 
     def get_model_recommendations(self, audio_duration: float = None) -> Dict:
         """获取模型推荐"""
-        current_model = getattr(self, 'model_path', getattr(self, 'model_name', self.model_size))
+        current_model = self.current_model
         recommended = self.config_manager.recommend_model(self.asr_engine, audio_duration)
 
         return {
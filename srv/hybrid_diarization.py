@@ -36,22 +36,41 @@ class HybridDiarization:
             n_speakers=n_speakers
         )
 
-        # 尝试初始化 PyAnnote 分离器
-        self.pyannote_diarizer = None
-        self._init_pyannote()
+        # PyAnnote 分离器在首次需要时才初始化
+        self._pyannote_inited = False
+        self._pyannote_diarizer = None
+
+    @property
+    def pyannote_diarizer(self):
+        """PyAnnote 分离器 (首次访问时加载，不可用时为 None)"""
+        if not self._pyannote_inited:
+            self._pyannote_inited = True
+            self._init_pyannote()
+        return self._pyannote_diarizer
+
+    def resolve_backend(self):
+        """
+        在调用线程中完成 PyAnnote 分离器的初始化 (可能提示输入 token)
+
+        在其他线程中执行 diarize 之前调用，避免 token 输入提示出现在工作线程中；
+        method 为 "local" 时不加载 PyAnnote
+        """
+        if self.method != "local":
+            return self.pyannote_diarizer
+        return None
 
     def _init_pyannote(self):
         """初始化 PyAnnote 分离器"""
         try:
             from .pyannote_diarization import PyAnnoteDiarization
-            self.pyannote_diarizer = PyAnnoteDiarization()
-            if self.pyannote_diarizer.is_available():
+            self._pyannote_diarizer = PyAnnoteDiarization()
+            if self._pyannote_diarizer.is_available():
                 print(" PyAnnote 分离器可用")
             else:
-                self.pyannote_diarizer = None
+                self._pyannote_diarizer = None
         except Exception as e:
             print(f" PyAnnote 不可用: {str(e)}")
-            self.pyannote_diarizer = None
+            self._pyannote_diarizer = None
 
     def diarize(self, audio_file: str, force_method: str = None) -> Dict:
         """
@@ -78,25 +97,27 @@ class HybridDiarization:
         else:
             return self._diarize_with_local(audio_file)
 
-    def _diarize_with_pyannote(self, audio_file: str, method: str = "pyannote") -> Dict:
+    def _diarize_with_pyannote(self, audio_file: str, method: str = "pyannote",
+                               sample_duration: Optional[float] = None) -> Dict:
         """使用 PyAnnote 进行分离"""
         try:
             if method == "pyannote_fast":
-                # 快速模式：自动分段处理长音频
-                result = self.pyannote_diarizer.diarize(audio_file, max_duration=300)  # 5分钟分段
+                # 合并模式：整段处理，超过5分钟的音频再合并相邻的同说话人片段
+                result = self.pyannote_diarizer.diarize(audio_file, max_duration=300,
+                                                        sample_duration=sample_duration)
                 result["method_used"] = "pyannote_fast"
             else:
                 # 标准模式
-                result = self.pyannote_diarizer.diarize(audio_file)
+                result = self.pyannote_diarizer.diarize(audio_file, sample_duration=sample_duration)
                 result["method_used"] = "pyannote"
             return result
         except Exception as e:
             print(f"PyAnnote 分离失败，回退到本地方法: {str(e)}")
-            return self._diarize_with_local(audio_file)
+            return self._diarize_with_local(audio_file, sample_duration)
 
-    def _diarize_with_local(self, audio_file: str) -> Dict:
+    def _diarize_with_local(self, audio_file: str, sample_duration: Optional[float] = None) -> Dict:
         """使用本地聚类方法进行分离"""
-        result = self.local_diarizer.diarize(audio_file)
+        result = self.local_diarizer.diarize(audio_file, sample_duration=sample_duration)
         result["method_used"] = "local_clustering"
         return result
 
@@ -135,12 +156,13 @@ class HybridDiarization:
         # 使用本地分离器的可视化功能
         self.local_diarizer.visualize_diarization(diarization_result, output_file)
 
-    def benchmark_methods(self, audio_file: str) -> Dict:
+    def benchmark_methods(self, audio_file: str, sample_seconds: Optional[float] = 60) -> Dict:
         """
         对比两种方法的效果 (如果都可用)
 
         Args:
             audio_file: 音频文件路径
+            sample_seconds: 只用开头的这么多秒做对比，None表示整个文件
 
         Returns:
             对比结果
@@ -149,7 +171,7 @@ class HybridDiarization:
 
         # 测试本地方法
         print(" 测试本地聚类方法...")
-        local_result = self._diarize_with_local(audio_file)
+        local_result = self._diarize_with_local(audio_file, sample_seconds)
         results["local"] = {
             "speakers": local_result.get("total_speakers", 0),
             "segments": len(local_result.get("segments", [])),
@@ -160,7 +182,7 @@ class HybridDiarization:
         if self.pyannote_diarizer:
             print(" 测试 PyAnnote 方法...")
             try:
-                pyannote_result = self._diarize_with_pyannote(audio_file)
+                pyannote_result = self._diarize_with_pyannote(audio_file, sample_duration=sample_seconds)
                 results["pyannote"] = {
                     "speakers": pyannote_result.get("total_speakers", 0),
                     "segments": len(pyannote_result.get("segments", [])),
@@ -113,8 +113,17 @@ class LocalASR:
             音频时长（秒）
         """
         try:
-            data, sample_rate = sf.read(audio_file)
-            return len(data) / sample_rate
+            # 只读取文件头
+            info = sf.info(audio_file)
+            return info.frames / info.samplerate
+        except RuntimeError:
+            # libsndfile 不支持的格式 (如 mp3) 交给 librosa 读取元数据
+            try:
+                import librosa
+                return librosa.get_duration(path=audio_file)
+            except Exception as e:
+                print(f"获取音频时长出错: {str(e)}")
+                return 0.0
         except Exception as e:
             print(f"获取音频时长出错: {str(e)}")
             return 0.0
@@ -3,15 +3,139 @@
 使用基于音频特征聚类的方法进行完全本地化的说话人分离
 """
 
+import hashlib
+import math
+import os
+from collections import defaultdict
+from functools import lru_cache
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import librosa
 import soundfile as sf
-from sklearn.cluster import KMeans, AgglomerativeClustering
-from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 from typing import Dict, List, Tuple, Optional
 import matplotlib.pyplot as plt
-from scipy.signal import find_peaks
+from scipy.fft import dct, rfft
+from scipy.signal import find_peaks, get_window
+from scipy.cluster.hierarchy import linkage, fcluster
+from sklearn.metrics import pairwise_distances, silhouette_score
+
+# 语音活动检测的能量阈值
+_SPEECH_ENERGY_THRESHOLD = 0.01
+
+# MFCC 帧移、FFT 长度和梅尔滤波器数（与 librosa 默认值一致）
+_MFCC_HOP = 512
+_MFCC_N_FFT = 2048
+_MFCC_N_MELS = 128
+
+# 每次做 FFT 的帧数，限制分帧矩阵的内存占用
+_MFCC_BLOCK_FRAMES = 4096
+
+# 特征提取时每次读取和处理的音频长度（秒）
+_CHUNK_SECONDS = 600
+
+# 分块重采样时两端多读的样本数（目标采样率），避免块边界处的滤波失真
+_RESAMPLE_MARGIN = 1024
+
+# 特征缓存目录；特征算法变化时递增版本号，使旧缓存失效
+_FEATURE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voice2code")
+_FEATURE_CACHE_VERSION = 4
+
+# 神经网络声纹嵌入模型 (公开模型，无需 token)
+_EMBEDDING_MODEL = "pyannote/wespeaker-voxceleb-resnet34-LM"
+_EMBEDDING_SAMPLE_RATE = 16000
+_EMBEDDING_BATCH_SIZE = 32
+
+# 层次聚类和轮廓系数使用的最大窗口数 (距离矩阵大小随其平方增长)，
+# 超过时改用 k-means 聚类，并在固定抽样的子集上估计说话人数量
+_WARD_MAX_SAMPLES = 3000
+
+# 长音频模式: 窗口数超过此值时分块做 MiniBatchKMeans，再合并各块的聚类中心
+_STREAMING_MIN_SAMPLES = 5000
+_STREAMING_CHUNK_SAMPLES = 2000
+_STREAMING_LOCAL_CLUSTERS = 16
+
+
+@lru_cache(maxsize=8)
+def _mfcc_basis(sr: int) -> Tuple[np.ndarray, np.ndarray]:
+    """给定采样率下的 Hann 窗和 (转置后的) 梅尔滤波器矩阵"""
+    window = get_window("hann", _MFCC_N_FFT).astype(np.float32)
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=_MFCC_N_FFT, n_mels=_MFCC_N_MELS)
+    return window, np.ascontiguousarray(mel_basis.T, dtype=np.float32)
+
+
+class _AudioSource:
+    """
+    按需读取音频片段 (单声道 float32，目标采样率)，超出文件范围的部分补零
+
+    libsndfile 支持的格式按片段 seek 读取并重采样；不支持的格式 (如 mp3) 由 librosa 整体读入内存
+    """
+
+    def __init__(self, audio_file: str, target_sr: Optional[int],
+                 sample_duration: Optional[float] = None):
+        try:
+            self._file = sf.SoundFile(audio_file)
+        except RuntimeError:
+            self._file = None
+            self._data, self.sr = librosa.load(audio_file, sr=target_sr, duration=sample_duration)
+            self.n_samples = len(self._data)
+            return
+
+        self._data = None
+        self._orig_sr = self._file.samplerate
+        self._orig_frames = self._file.frames
+        if sample_duration:
+            self._orig_frames = min(self._orig_frames, int(sample_duration * self._orig_sr))
+
+        # 目标采样率与原始采样率之比为 up/down，原始样本每 down 个对应目标样本 up 个
+        self.sr = target_sr or self._orig_sr
+        g = math.gcd(self.sr, self._orig_sr)
+        self._up, self._down = self.sr // g, self._orig_sr // g
+        self.n_samples = -(-self._orig_frames * self._up // self._down)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            self._file.close()
+
+    @staticmethod
+    def _slice(data: np.ndarray, start: int, stop: int, length: int) -> np.ndarray:
+        """取 data 的 [start, stop)，只使用前 length 个样本，其余补零"""
+        out = np.zeros(stop - start, dtype=np.float32)
+        lo, hi = max(start, 0), min(stop, length)
+        if hi > lo:
+            out[lo - start:hi - start] = data[lo:hi] if data.ndim == 1 else data[lo:hi].mean(axis=1)
+        return out
+
+    def _read_orig(self, start: int, stop: int) -> np.ndarray:
+        """读取原始采样率下的 [start, stop)"""
+        lo, hi = max(start, 0), min(stop, self._orig_frames)
+        if hi <= lo:
+            return np.zeros(stop - start, dtype=np.float32)
+        self._file.seek(lo)
+        data = self._file.read(frames=hi - lo, dtype='float32', always_2d=True)
+        return self._slice(data, start - lo, stop - lo, len(data))
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """读取目标采样率下的 [start, stop)"""
+        if self._data is not None:
+            return self._slice(self._data, start, stop, self.n_samples)
+        if self._up == self._down:
+            return self._read_orig(start, stop)
+
+        # 起止点对齐到 up 的整数倍 (恰好对应原始样本)，并多读一段余量后再裁掉
+        margin = -(-_RESAMPLE_MARGIN // self._up) * self._up
+        a = start // self._up * self._up - margin
+        b = -(-stop // self._up) * self._up + margin
+        y = librosa.resample(self._read_orig(a // self._up * self._down, b // self._up * self._down),
+                             orig_sr=self._orig_sr, target_sr=self.sr)
+        out = self._slice(y, start - a, stop - a, self.n_samples - a)
+        if start < 0:
+            # 文件开头之前补零 (与整体读取后补零一致)
+            out[:-start] = 0.0
+        return out
 
 
 class LocalDiarization:
@@ -21,7 +145,10 @@ class LocalDiarization:
                  window_length: float = 2.0,  # 窗口长度（秒）
                  hop_length: float = 1.0,  # 跳跃长度（秒）
                  n_mfcc: int = 13,  # MFCC特征数量
-                 n_speakers: Optional[int] = None):  # 说话人数量，None表示自动估计
+                 n_speakers: Optional[int] = None,  # 说话人数量，None表示自动估计
+                 embedding: str = "auto",  # "mfcc", "neural", "auto"
+                 target_sr: Optional[int] = 16000,  # 分析采样率，None表示保持原始采样率
+                 long_audio_mode: bool = True):  # 窗口很多时使用两阶段分块聚类
         """
         初始化本地说话人分离器
 
@@ -30,87 +157,307 @@ class LocalDiarization:
             hop_length: 窗口间跳跃长度（秒）
             n_mfcc: MFCC特征维度
             n_speakers: 说话人数量，None表示自动估计
+            embedding: 窗口特征类型 ("mfcc" MFCC统计特征, "neural" 声纹嵌入模型,
+                       "auto" 在 Apple Silicon 上且已安装 pyannote.audio 时使用声纹嵌入)
+            target_sr: MFCC 特征的分析采样率，None表示保持原始采样率 (声纹嵌入固定使用 16kHz)
+            long_audio_mode: 窗口数超过 _STREAMING_MIN_SAMPLES 时先分块聚类再合并，内存与音频长度无关
         """
         self.window_length = window_length
         self.hop_length = hop_length
         self.n_mfcc = n_mfcc
         self.n_speakers = n_speakers
-        self.scaler = StandardScaler()
-
-    def extract_features(self, audio_file: str) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
+        self.embedding = embedding
+        self.target_sr = target_sr
+        self.long_audio_mode = long_audio_mode
+
+        # 最近一次聚类时的特征标准化参数
+        self.feature_mean = None
+        self.feature_std = None
+
+        # 声纹嵌入模型在首次提取特征时才加载
+        self._embedding_inited = False
+        self._embedding_model = None
+        self._embedding_device = None
+
+    def extract_features(self, audio_file: str,
+                         sample_duration: Optional[float] = None,
+                         cache_features: bool = True,
+                         cache_regenerate: bool = False) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
         """
         提取音频特征
 
         Args:
             audio_file: 音频文件路径
+            sample_duration: 只分析开头的这么多秒，None表示整个文件
+            cache_features: 是否使用磁盘特征缓存
+            cache_regenerate: 忽略已有缓存，重新计算并覆盖
 
         Returns:
             特征矩阵和对应的时间窗口
         """
+        cache_file = self._feature_cache_file(audio_file, sample_duration) if cache_features else None
+
+        if cache_file and not cache_regenerate:
+            cached = self._load_cached_features(cache_file)
+            if cached is not None:
+                return cached
+
+        features, time_windows = self._compute_features(audio_file, sample_duration)
+
+        if cache_file and len(features):
+            self._save_cached_features(cache_file, features, time_windows)
+
+        return features, time_windows
+
+    def _feature_cache_file(self, audio_file: str, sample_duration: Optional[float]) -> Optional[str]:
+        """特征缓存文件路径，由音频文件及特征参数决定；文件不存在时返回 None"""
         try:
-            # 加载音频
-            y, sr = librosa.load(audio_file, sr=None)
-
-            # 计算窗口大小（样本点数）
-            window_samples = int(self.window_length * sr)
-            hop_samples = int(self.hop_length * sr)
-
-            features = []
-            time_windows = []
-
-            # 滑动窗口提取特征
-            for start in range(0, len(y) - window_samples + 1, hop_samples):
-                end = start + window_samples
-                window_audio = y[start:end]
-
-                # 检查音频活动性（简单的能量阈值）
-                if self._is_speech(window_audio):
-                    # 提取MFCC特征
-                    mfcc = librosa.feature.mfcc(
-                        y=window_audio,
-                        sr=sr,
-                        n_mfcc=self.n_mfcc
-                    )
+            stat = os.stat(audio_file)
+        except OSError:
+            return None
+
+        key = "|".join(str(part) for part in (
+            _FEATURE_CACHE_VERSION, os.path.abspath(audio_file), stat.st_mtime_ns, stat.st_size,
+            sample_duration, self.window_length, self.hop_length, self.n_mfcc, self.target_sr,
+            self._embedding_backend()
+        ))
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(_FEATURE_CACHE_DIR, f"feat_{digest}.npz")
+
+    @staticmethod
+    def _load_cached_features(cache_file: str) -> Optional[Tuple[np.ndarray, List[Tuple[float, float]]]]:
+        """读取特征缓存，不存在或损坏时返回 None"""
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with np.load(cache_file) as data:
+                features = data["features"]
+                time_windows = [tuple(w) for w in data["windows"].tolist()]
+            return features, time_windows
+        except Exception:
+            return None
+
+    @staticmethod
+    def _save_cached_features(cache_file: str, features: np.ndarray,
+                              time_windows: List[Tuple[float, float]]):
+        """写入特征缓存 (先写临时文件再替换)，失败时忽略"""
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp.npz"
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            np.savez_compressed(tmp_file, features=features,
+                                windows=np.asarray(time_windows, dtype=np.float64))
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            print(f"特征缓存写入失败: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _wants_neural(self) -> bool:
+        """按配置、平台以及是否安装 pyannote.audio 判断是否应使用声纹嵌入 (不加载模型)"""
+        if self.embedding == "neural":
+            return True
+        if self.embedding == "auto":
+            import importlib.util
+            import platform
+            if platform.system() != "Darwin" or platform.machine() not in ("arm64", "aarch64"):
+                return False
+            try:
+                return importlib.util.find_spec("pyannote.audio") is not None
+            except ImportError:
+                # 未安装 pyannote 包本身
+                return False
+        return False
+
+    def _embedding_backend(self) -> str:
+        """实际使用的特征类型: "neural" 或 "mfcc"，模型不可用时回退到 MFCC"""
+        if self._wants_neural() and self._get_embedding_model() is not None:
+            return "neural"
+        return "mfcc"
+
+    def _get_embedding_model(self):
+        """加载声纹嵌入模型 (只尝试一次)，不可用时返回 None"""
+        if self._embedding_inited:
+            return self._embedding_model
+        self._embedding_inited = True
 
-                    # 使用统计特征（均值和标准差）
-                    mfcc_mean = np.mean(mfcc, axis=1)
-                    mfcc_std = np.std(mfcc, axis=1)
-                    feature_vector = np.concatenate([mfcc_mean, mfcc_std])
+        try:
+            import torch
+            from pyannote.audio import Model
+
+            model = Model.from_pretrained(_EMBEDDING_MODEL)
+            if torch.backends.mps.is_available():
+                device = torch.device("mps")
+            elif torch.cuda.is_available():
+                device = torch.device("cuda")
+            else:
+                device = torch.device("cpu")
+            model.to(device)
+            model.eval()
 
-                    features.append(feature_vector)
+            self._embedding_model = model
+            self._embedding_device = device
+            print(f" 使用声纹嵌入模型: {_EMBEDDING_MODEL} ({device.type})")
+        except Exception as e:
+            print(f" 声纹嵌入模型不可用，使用 MFCC 特征: {e}")
+            self._embedding_model = None
+
+        return self._embedding_model
+
+    def _compute_features(self, audio_file: str,
+                          sample_duration: Optional[float] = None) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
+        """对音频做滑动窗口特征提取，每次只读取和处理 _CHUNK_SECONDS 秒，内存占用与音频长度无关"""
+        try:
+            backend = self._embedding_backend()
+
+            # 声纹嵌入模型需要 16kHz
+            target_sr = _EMBEDDING_SAMPLE_RATE if backend == "neural" else self.target_sr
+
+            with _AudioSource(audio_file, target_sr, sample_duration) as source:
+                sr = source.sr
+
+                # 计算窗口大小（样本点数）
+                window_samples = int(self.window_length * sr)
+                hop_samples = int(self.hop_length * sr)
+
+                if source.n_samples < window_samples:
+                    return np.array([]), []
+
+                n_windows = (source.n_samples - window_samples) // hop_samples + 1
+                n_frames = 1 + source.n_samples // _MFCC_HOP
+                chunk_windows = max(1, int(_CHUNK_SECONDS * sr) // hop_samples)
+
+                features = []
+                time_windows = []
+                for w0 in range(0, n_windows, chunk_windows):
+                    # 本块各窗口的起始样本点
+                    starts = np.arange(w0, min(w0 + chunk_windows, n_windows)) * hop_samples
+                    ends = starts + window_samples
+
+                    # MFCC 帧以 _MFCC_HOP 的整数倍为中心，需从所在帧网格开始并在两端多读半个 FFT 长度
+                    if backend == "neural":
+                        read_start, read_stop = int(starts[0]), int(ends[-1])
+                    else:
+                        frame_offset = int(starts[0]) // _MFCC_HOP
+                        frame_stop = min(int(ends[-1]) // _MFCC_HOP + 1, n_frames)
+                        read_start = frame_offset * _MFCC_HOP - _MFCC_N_FFT // 2
+                        read_stop = (frame_stop - 1) * _MFCC_HOP + _MFCC_N_FFT // 2
+                    y = source.read(read_start, read_stop)
+
+                    # 检查音频活动性（简单的能量阈值），用累积和一次算出本块所有窗口的能量
+                    sq_cumsum = np.concatenate(([0.0], np.cumsum(np.square(y, dtype=np.float64))))
+                    energy = (sq_cumsum[ends - read_start] - sq_cumsum[starts - read_start]) / window_samples
+                    is_speech = energy > _SPEECH_ENERGY_THRESHOLD
+                    if not is_speech.any():
+                        continue
+
+                    starts = starts[is_speech]
+                    ends = ends[is_speech]
+
+                    if backend == "neural":
+                        features.append(self._neural_features(y, starts - read_start, window_samples))
+                    else:
+                        features.append(self._mfcc_features(y, sr, starts, ends, frame_offset, n_frames))
 
                     # 记录时间窗口
-                    start_time = start / sr
-                    end_time = end / sr
-                    time_windows.append((start_time, end_time))
+                    time_windows.extend(
+                        (start / sr, end / sr)
+                        for start, end in zip(starts.tolist(), ends.tolist())
+                    )
 
-            return np.array(features), time_windows
+            if not features:
+                return np.array([]), []
+
+            return np.concatenate(features, axis=0), time_windows
 
         except Exception as e:
             print(f"特征提取出错: {str(e)}")
             return np.array([]), []
 
-    def _is_speech(self, audio_segment: np.ndarray, threshold: float = 0.01) -> bool:
+    def _mfcc(self, y: np.ndarray, sr: int) -> np.ndarray:
         """
-        简单的语音活动检测
+        音频片段的 MFCC，形状 (n_mfcc, 帧数)，y 两端已包含半个 FFT 长度的上下文，第 t 帧为 y[t*hop : t*hop+n_fft]
 
-        Args:
-            audio_segment: 音频片段
-            threshold: 能量阈值
+        与 librosa.feature.mfcc 默认参数的计算一致 (居中分帧、功率谱、对数梅尔谱限幅 80dB、正交 DCT)，
+        但分块直接调用 FFT 和矩阵乘法，避免逐层的参数校验和中间数组；80dB 限幅以本片段的最大值为准
+        """
+        window, mel_t = _mfcc_basis(sr)
 
-        Returns:
-            是否包含语音
+        frames = sliding_window_view(y, _MFCC_N_FFT)[::_MFCC_HOP]
+        n_frames = len(frames)
+
+        log_mel = np.empty((n_frames, _MFCC_N_MELS), dtype=np.float32)
+        for i in range(0, n_frames, _MFCC_BLOCK_FRAMES):
+            spec = rfft(frames[i:i + _MFCC_BLOCK_FRAMES] * window, axis=-1, workers=-1)
+            log_mel[i:i + _MFCC_BLOCK_FRAMES] = (spec.real ** 2 + spec.imag ** 2) @ mel_t
+
+        # 功率转分贝，并限制在最大值以下 80dB 内
+        np.maximum(log_mel, 1e-10, out=log_mel)
+        np.log10(log_mel, out=log_mel)
+        log_mel *= 10.0
+        np.maximum(log_mel, log_mel.max() - 80.0, out=log_mel)
+
+        mfcc = dct(log_mel, type=2, axis=-1, norm="ortho", workers=-1)[:, :self.n_mfcc]
+        return mfcc.T
+
+    def _mfcc_features(self, y: np.ndarray, sr: int, starts: np.ndarray, ends: np.ndarray,
+                       frame_offset: int, n_frames: int) -> np.ndarray:
         """
-        energy = np.mean(audio_segment ** 2)
-        return energy > threshold
+        各窗口的 MFCC 均值和标准差
 
-    def estimate_speakers(self, features: np.ndarray, max_speakers: int = 6) -> int:
+        y 从第 frame_offset 帧的起点开始 (见 _mfcc)，starts/ends 为整个文件中的样本位置，
+        n_frames 为整个文件的帧数
+        """
+        # 对本块音频提取一次 MFCC (帧移 _MFCC_HOP)，再按窗口聚合帧
+        mfcc = self._mfcc(y, sr)
+
+        # 每个窗口包含中心点落在 [start, end] 内的帧，与单独对窗口提取时的帧数一致
+        first = np.minimum(-(-starts // _MFCC_HOP), n_frames - 1) - frame_offset
+        last = np.minimum(ends // _MFCC_HOP + 1, n_frames) - frame_offset
+        counts = np.maximum(last - first, 1)
+
+        # 使用统计特征（均值和标准差），通过前缀和一次算出所有窗口；
+        # 前缀和直接写入预分配的数组 (第0列为0)，以 float64 累加避免长音频的精度损失
+        cumsum = np.zeros((mfcc.shape[0], mfcc.shape[1] + 1))
+        cumsum_sq = np.zeros((mfcc.shape[0], mfcc.shape[1] + 1))
+        np.cumsum(mfcc, axis=1, dtype=np.float64, out=cumsum[:, 1:])
+        np.cumsum(np.square(mfcc), axis=1, dtype=np.float64, out=cumsum_sq[:, 1:])
+
+        mfcc_mean = (cumsum[:, last] - cumsum[:, first]) / counts
+        mfcc_var = (cumsum_sq[:, last] - cumsum_sq[:, first]) / counts - mfcc_mean ** 2
+        mfcc_std = np.sqrt(np.maximum(mfcc_var, 0.0))
+
+        return np.concatenate([mfcc_mean, mfcc_std], axis=0).T
+
+    def _neural_features(self, y: np.ndarray, starts: np.ndarray, window_samples: int) -> np.ndarray:
+        """各窗口的声纹嵌入，按批送入模型 (GPU/MPS 上一次处理一批窗口)"""
+        import torch
+
+        offsets = np.arange(window_samples)
+        embeddings = []
+
+        with torch.inference_mode():
+            for i in range(0, len(starts), _EMBEDDING_BATCH_SIZE):
+                batch_starts = starts[i:i + _EMBEDDING_BATCH_SIZE]
+                # (B, 1, T) 批量波形
+                batch = y[batch_starts[:, None] + offsets][:, None, :]
+                waveforms = torch.from_numpy(np.ascontiguousarray(batch, dtype=np.float32))
+                output = self._embedding_model(waveforms.to(self._embedding_device))
+                embeddings.append(output.float().cpu().numpy())
+
+        return np.concatenate(embeddings, axis=0)
+
+    def estimate_speakers(self, features: np.ndarray, max_speakers: int = 6,
+                          linkage_matrix: Optional[np.ndarray] = None) -> int:
         """
         估计说话人数量
 
+        对层次聚类树在不同说话人数处切分，选择轮廓系数最高的切分。
+        聚类树和距离矩阵都只计算一次。
+
         Args:
             features: 特征矩阵
             max_speakers: 最大说话人数
+            linkage_matrix: 已计算好的 ward 聚类树，None 时在此计算
 
         Returns:
             估计的说话人数量
@@ -118,25 +465,33 @@ class LocalDiarization:
         if len(features) < 2:
             return 1
 
-        inertias = []
-        k_range = range(1, min(max_speakers + 1, len(features) + 1))
-
-        for k in k_range:
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            kmeans.fit(features)
-            inertias.append(kmeans.inertia_)
-
-        # 使用肘部法则估计最优聚类数
-        if len(inertias) < 2:
-            return 1
-
-        # 计算二阶差分
-        diff2 = np.diff(inertias, 2)
-        if len(diff2) > 0:
-            optimal_k = np.argmax(diff2) + 2  # +2因为差分操作导致的索引偏移
-            return min(optimal_k, max_speakers)
-
-        return 2  # 默认返回2个说话人
+        # 轮廓系数要求 2 <= 聚类数 <= 样本数 - 1
+        k_max = min(max_speakers, len(features) - 1)
+        if k_max < 2:
+            return 2  # 默认返回2个说话人
+
+        # 窗口过多时固定抽取一部分估计
+        if len(features) > _WARD_MAX_SAMPLES:
+            rng = np.random.RandomState(42)
+            subset = np.sort(rng.choice(len(features), _WARD_MAX_SAMPLES, replace=False))
+            features = features[subset]
+            linkage_matrix = None
+
+        if linkage_matrix is None:
+            linkage_matrix = linkage(features, method='ward')
+        # 轮廓系数只用于比较不同切分，float32 距离矩阵足够精确，内存减半
+        distances = pairwise_distances(np.asarray(features, dtype=np.float32))
+
+        best_k, best_score = 2, -np.inf
+        for k in range(2, k_max + 1):
+            labels = fcluster(linkage_matrix, t=k, criterion='maxclust')
+            if len(np.unique(labels)) < 2:
+                continue
+            score = silhouette_score(distances, labels, metric='precomputed')
+            if score > best_score:
+                best_k, best_score = k, score
+
+        return best_k
 
     def cluster_speakers(self, features: np.ndarray, n_speakers: Optional[int] = None) -> np.ndarray:
         """
@@ -152,41 +507,113 @@ class LocalDiarization:
         if len(features) == 0:
             return np.array([])
 
-        # 标准化特征
-        features_scaled = self.scaler.fit_transform(features)
+        # 标准化特征 (只复制一次，之后原地计算)
+        features_scaled = np.array(features, dtype=np.float32)
+        self.feature_mean = features_scaled.mean(axis=0)
+        self.feature_std = features_scaled.std(axis=0)
+        self.feature_std[self.feature_std == 0] = 1.0
+        features_scaled -= self.feature_mean
+        features_scaled /= self.feature_std
 
         # 降维（如果特征维度过高）
         if features_scaled.shape[1] > 50:
-            pca = PCA(n_components=20)
+            pca = PCA(n_components=20, svd_solver='randomized', random_state=42)
             features_scaled = pca.fit_transform(features_scaled)
 
+        if len(features_scaled) < 2:
+            return np.zeros(len(features_scaled), dtype=int)
+
+        # 窗口不多时使用层次聚类（通常比K-means更稳定），聚类树在估计说话人数量和最终切分间共用；
+        # 长音频的层次聚类需要 O(N²) 内存，改用 k-means
+        use_ward = len(features_scaled) <= _WARD_MAX_SAMPLES
+        linkage_matrix = linkage(features_scaled, method='ward') if use_ward else None
+
         # 估计说话人数量
         if n_speakers is None:
-            n_speakers = self.n_speakers or self.estimate_speakers(features_scaled)
+            n_speakers = self.n_speakers or self.estimate_speakers(features_scaled,
+                                                                   linkage_matrix=linkage_matrix)
 
         print(f"使用 {n_speakers} 个说话人进行聚类")
 
-        # 使用层次聚类（通常比K-means更稳定）
-        clustering = AgglomerativeClustering(
-            n_clusters=n_speakers,
-            linkage='ward'
-        )
+        if use_ward:
+            return fcluster(linkage_matrix, t=n_speakers, criterion='maxclust') - 1
+        if self.long_audio_mode and len(features_scaled) > _STREAMING_MIN_SAMPLES:
+            return self._streaming_kmeans_labels(features_scaled, n_speakers)
+        return self._kmeans_labels(features_scaled, n_speakers)
+
+    @staticmethod
+    def _l2_normalized(features: np.ndarray) -> np.ndarray:
+        """按行 L2 归一化后的 float32 副本"""
+        feats = np.array(features, dtype=np.float32)
+        norms = np.linalg.norm(feats, axis=1, keepdims=True)
+        feats /= np.maximum(norms, 1e-12)
+        return feats
+
+    @staticmethod
+    def _kmeans_labels(features: np.ndarray, n_speakers: int) -> np.ndarray:
+        """
+        在 L2 归一化的特征上做球面 k-means，内存为 O(N·d)
 
-        labels = clustering.fit_predict(features_scaled)
-        return labels
+        已安装 faiss 时使用 faiss，否则使用 sklearn KMeans
+        """
+        feats = LocalDiarization._l2_normalized(features)
 
-    def diarize(self, audio_file: str) -> Dict:
+        try:
+            import faiss
+        except ImportError:
+            from sklearn.cluster import KMeans
+            return KMeans(n_clusters=n_speakers, random_state=42, n_init=10).fit_predict(feats)
+
+        kmeans = faiss.Kmeans(feats.shape[1], n_speakers, niter=20, spherical=True,
+                              verbose=False, seed=42)
+        kmeans.train(feats)
+        _, labels = kmeans.index.search(feats, 1)
+        return labels.ravel()
+
+    @staticmethod
+    def _streaming_kmeans_labels(features: np.ndarray, n_speakers: int) -> np.ndarray:
+        """
+        两阶段聚类: 每块约 _STREAMING_CHUNK_SAMPLES 个窗口各做一次 MiniBatchKMeans，
+        再把所有块的聚类中心按所含窗口数加权聚成 n_speakers 类，窗口标签经两层映射得到
+        """
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+
+        feats = LocalDiarization._l2_normalized(features)
+        n_chunks = -(-len(feats) // _STREAMING_CHUNK_SAMPLES)
+
+        local_labels = np.empty(len(feats), dtype=np.intp)
+        centers = []
+        weights = []
+        offset = 0
+        for chunk_idx in np.array_split(np.arange(len(feats)), n_chunks):
+            chunk = feats[chunk_idx]
+            k_local = min(_STREAMING_LOCAL_CLUSTERS, len(chunk))
+            mbk = MiniBatchKMeans(n_clusters=k_local, batch_size=256, n_init=3, random_state=42)
+            labels = mbk.fit_predict(chunk)
+
+            local_labels[chunk_idx] = labels + offset
+            centers.append(mbk.cluster_centers_)
+            weights.append(np.bincount(labels, minlength=k_local))
+            offset += k_local
+
+        # 聚类中心只有 块数 × _STREAMING_LOCAL_CLUSTERS 个，用普通 KMeans 合并
+        global_kmeans = KMeans(n_clusters=n_speakers, random_state=42, n_init=10)
+        center_labels = global_kmeans.fit_predict(np.vstack(centers), sample_weight=np.concatenate(weights))
+        return center_labels[local_labels]
+
+    def diarize(self, audio_file: str, sample_duration: Optional[float] = None) -> Dict:
         """
         执行说话人分离
 
         Args:
             audio_file: 音频文件路径
+            sample_duration: 只分析开头的这么多秒，None表示整个文件
 
         Returns:
             说话人分离结果
         """
         print("开始提取音频特征...")
-        features, time_windows = self.extract_features(audio_file)
+        features, time_windows = self.extract_features(audio_file, sample_duration)
 
         if len(features) == 0:
             return {
@@ -200,50 +627,46 @@ class LocalDiarization:
         print("开始说话人聚类...")
         labels = self.cluster_speakers(features)
 
-        # 格式化结果
-        segments = []
-        for i, (start_time, end_time) in enumerate(time_windows):
-            segments.append({
-                "start": start_time,
-                "end": end_time,
-                "speaker": f"Speaker_{labels[i]}"
-            })
-
-        # 合并相邻的同一说话人片段
-        merged_segments = self._merge_consecutive_segments(segments)
+        # 合并相邻的同一说话人窗口
+        merged_segments = self._merge_consecutive_segments(labels, time_windows)
+        unique_labels = np.unique(labels)
 
         return {
             "segments": merged_segments,
-            "speakers": list(set([seg["speaker"] for seg in merged_segments])),
-            "total_speakers": len(set(labels))
+            "speakers": [f"Speaker_{label}" for label in unique_labels.tolist()],
+            "total_speakers": len(unique_labels)
         }
 
-    def _merge_consecutive_segments(self, segments: List[Dict]) -> List[Dict]:
+    def _merge_consecutive_segments(self, labels: np.ndarray,
+                                    time_windows: List[Tuple[float, float]]) -> List[Dict]:
         """
-        合并相邻的同一说话人片段
+        合并相邻的同一说话人窗口
 
         Args:
-            segments: 原始分段列表
+            labels: 每个窗口的说话人标签
+            time_windows: 每个窗口的 (开始时间, 结束时间)
 
         Returns:
             合并后的分段列表
         """
-        if not segments:
+        if not time_windows:
             return []
 
-        merged = [segments[0].copy()]
+        labels = np.asarray(labels)
+        windows = np.asarray(time_windows, dtype=np.float64)
+        starts, ends = windows[:, 0], windows[:, 1]
 
-        for seg in segments[1:]:
-            last_seg = merged[-1]
-
-            # 如果是同一说话人且时间连续，则合并
-            if (seg["speaker"] == last_seg["speaker"] and
-                abs(seg["start"] - last_seg["end"]) < self.hop_length * 1.5):
-                last_seg["end"] = seg["end"]
-            else:
-                merged.append(seg.copy())
+        # 说话人变化或时间不连续 (静音窗口被跳过) 处断开
+        breaks = (labels[1:] != labels[:-1]) | (np.abs(starts[1:] - ends[:-1]) >= self.hop_length * 1.5)
+        changes = np.flatnonzero(breaks) + 1
+        run_starts = np.r_[0, changes]
+        run_ends = np.r_[changes, len(labels)] - 1
 
-        return merged
+        return [
+            {"start": start, "end": end, "speaker": f"Speaker_{label}"}
+            for start, end, label in zip(starts[run_starts].tolist(), ends[run_ends].tolist(),
+                                         labels[run_starts].tolist())
+        ]
 
     def visualize_diarization(self, diarization_result: Dict, output_file: str = "diarization_plot.png"):
         """
@@ -263,12 +686,15 @@ class LocalDiarization:
             colors = plt.cm.Set3(np.linspace(0, 1, len(speakers)))
             speaker_colors = {speaker: colors[i] for i, speaker in enumerate(speakers)}
 
-            # 绘制时间线
+            # 按说话人分组，每个说话人只绘制一个图形集合
+            spans_by_speaker = defaultdict(list)
             for seg in segments:
-                start, end, speaker = seg["start"], seg["end"], seg["speaker"]
-                ax.barh(0, end - start, left=start, height=0.5,
-                        color=speaker_colors[speaker], alpha=0.7,
-                        label=speaker if speaker not in ax.get_legend_handles_labels()[1] else "")
+                spans_by_speaker[seg["speaker"]].append((seg["start"], seg["end"] - seg["start"]))
+
+            # 绘制时间线
+            for speaker, spans in spans_by_speaker.items():
+                ax.broken_barh(spans, (-0.25, 0.5), facecolors=speaker_colors[speaker],
+                               alpha=0.7, label=speaker)
 
             ax.set_xlabel("时间 (秒)")
             ax.set_ylabel("说话人")
@@ -277,7 +703,7 @@ class LocalDiarization:
             ax.grid(True, alpha=0.3)
 
             plt.tight_layout()
-            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+            plt.savefig(output_file, dpi=150, bbox_inches='tight')
             plt.close()
 
             print(f"可视化结果已保存到: {output_file}")
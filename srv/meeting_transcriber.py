@@ -3,13 +3,80 @@
 完全本地化的会议转录解决方案
 """
 
+import csv
 import json
-import platform
-from typing import Dict, List
+import multiprocessing
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Dict, List, Optional, Tuple
 from .hybrid_diarization import HybridDiarization
-import pandas as pd
+import numpy as np
 from datetime import datetime
 
+# 优先使用 orjson (C 实现，序列化更快)，不可用时回退到标准库
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                            | orjson.OPT_SERIALIZE_NUMPY)
+
+except ImportError:
+    def _json_default(obj):
+        if is_dataclass(obj):
+            return asdict(obj)
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_json_default).encode('utf-8')
+
+# CSV 导出的表头
+_CSV_HEADER = ("时间戳", "开始时间(秒)", "结束时间(秒)", "说话人", "文本内容")
+
+
+@dataclass
+class AlignedSegment:
+    """对齐后的转录片段 (导出 JSON 时序列化为同名字段的对象)"""
+    __slots__ = ("start", "end", "text", "speaker", "duration")
+
+    start: float
+    end: float
+    text: str
+    speaker: str
+    duration: float
+
+
+def _timed(func, *args):
+    """执行 func(*args)，返回 (结果, 耗时秒数)"""
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+# 批量转录的默认进程数上限 (每个进程都加载完整模型)
+_BATCH_DEFAULT_WORKERS = 2
+
+# 批量转录工作进程内的转录器 (每个进程初始化一次)
+_WORKER_TRANSCRIBER = None
+
+
+def _init_batch_worker(init_args: Dict):
+    """批量转录工作进程初始化: 创建该进程自己的转录器"""
+    global _WORKER_TRANSCRIBER
+    _WORKER_TRANSCRIBER = MeetingTranscriber(**init_args)
+
+
+def _transcribe_in_worker(audio_file: str) -> Dict:
+    """在工作进程中转录单个文件"""
+    try:
+        return _WORKER_TRANSCRIBER.transcribe_meeting(audio_file)
+    except Exception as e:
+        return {"error": str(e)}
+
 
 class MeetingTranscriber:
     """会议转录器主类"""
@@ -18,7 +85,8 @@ class MeetingTranscriber:
                  whisper_model: str = "auto",
                  diarization_method: str = "auto",
                  window_length: float = 2.0,
-                 hop_length: float = 1.0):
+                 hop_length: float = 1.0,
+                 parallel_stages: bool = False):
         """
         初始化会议转录器
 
@@ -27,6 +95,8 @@ class MeetingTranscriber:
             diarization_method: 说话人分离方法 ("auto", "pyannote", "local")
             window_length: 说话人分离窗口长度
             hop_length: 说话人分离跳跃长度
+            parallel_stages: 语音转文字和说话人分离是否并行执行 (默认关闭: 两者都可能使用
+                             同一块 GPU/MPS 而相互争用，且进度输出会交错；适合说话人分离在 CPU 上运行时开启)
         """
         print("初始化语音转录器...")
         self.asr = self._init_asr(whisper_model)
@@ -35,6 +105,17 @@ class MeetingTranscriber:
             window_length=window_length,
             hop_length=hop_length
         )
+        self.parallel_stages = parallel_stages
+
+        # 批量转录时工作进程使用相同参数创建转录器 (交互式选择的模型替换为已选定的模型)；
+        # 多个进程已在并行，进程内不再并行两个阶段，避免同时加载过多模型实例争用 GPU 和内存
+        self._init_args = {
+            "whisper_model": self.asr.current_model if whisper_model == "interactive" else whisper_model,
+            "diarization_method": diarization_method,
+            "window_length": window_length,
+            "hop_length": hop_length,
+            "parallel_stages": False
+        }
 
     def _init_asr(self, model_config):
         """动态初始化ASR引擎"""
@@ -62,29 +143,43 @@ class MeetingTranscriber:
         Returns:
             完整的转录结果
         """
-        import time
-
         total_start_time = time.time()
         print("=" * 50)
         print("开始会议转录...")
         print("=" * 50)
 
-        # 步骤1: 语音转文字
-        print("\n1. 执行语音转文字...")
-        step1_start = time.time()
-        asr_result = self.asr.transcribe_with_timestamps(audio_file)
-        step1_time = time.time() - step1_start
-        print(f"   语音转文字完成，耗时: {step1_time:.1f}秒")
+        # 步骤1、2: 语音转文字和说话人分离 (开启 parallel_stages 时，说话人分离在后台线程与主线程的 ASR 并行执行)
+        if self.parallel_stages:
+            # PyAnnote 在主线程完成初始化，token 输入提示不会与 ASR 输出交错
+            self.diarizer.resolve_backend()
+
+            print("\n1-2. 并行执行语音转文字和说话人分离...")
+            executor = ThreadPoolExecutor(max_workers=1)
+            diarization_future = executor.submit(_timed, self.diarizer.diarize, audio_file)
+            try:
+                asr_result, step1_time = _timed(self.asr.transcribe_with_timestamps, audio_file)
+                print(f"   语音转文字完成，耗时: {step1_time:.1f}秒")
+
+                # ASR 失败时不等待说话人分离 (尚未开始则取消，已在运行则在后台结束后丢弃结果)
+                if "error" in asr_result:
+                    diarization_future.cancel()
+                    return {"error": f"ASR失败: {asr_result['error']}"}
+
+                diarization_result, step2_time = diarization_future.result()
+            finally:
+                executor.shutdown(wait=False)
+            print(f"   说话人分离完成，耗时: {step2_time:.1f}秒")
+        else:
+            print("\n1. 执行语音转文字...")
+            asr_result, step1_time = _timed(self.asr.transcribe_with_timestamps, audio_file)
+            print(f"   语音转文字完成，耗时: {step1_time:.1f}秒")
 
-        if "error" in asr_result:
-            return {"error": f"ASR失败: {asr_result['error']}"}
+            if "error" in asr_result:
+                return {"error": f"ASR失败: {asr_result['error']}"}
 
-        # 步骤2: 说话人分离
-        print("\n2. 执行说话人分离...")
-        step2_start = time.time()
-        diarization_result = self.diarizer.diarize(audio_file)
-        step2_time = time.time() - step2_start
-        print(f"   说话人分离完成，耗时: {step2_time:.1f}秒")
+            print("\n2. 执行说话人分离...")
+            diarization_result, step2_time = _timed(self.diarizer.diarize, audio_file)
+            print(f"   说话人分离完成，耗时: {step2_time:.1f}秒")
 
         if "error" in diarization_result:
             return {"error": f"说话人分离失败: {diarization_result['error']}"}
@@ -123,6 +218,62 @@ class MeetingTranscriber:
 
         return final_result
 
+    def transcribe_batch(self, files: List[str], n_workers: int = None) -> List[Dict]:
+        """
+        并行转录多个会议音频，每个工作进程独立加载模型
+
+        Args:
+            files: 音频文件路径列表
+            n_workers: 工作进程数，None 表示 min(_BATCH_DEFAULT_WORKERS, CPU 核数)；
+                       每个进程都持有一份完整的 Whisper 和说话人分离模型，进程数受内存限制
+
+        Returns:
+            与 files 顺序一致的转录结果列表
+        """
+        if not files:
+            return []
+
+        if n_workers is None:
+            n_workers = min(_BATCH_DEFAULT_WORKERS, os.cpu_count() or 1)
+        n_workers = max(1, min(n_workers, len(files)))
+
+        # 单进程时直接复用当前转录器
+        if n_workers == 1:
+            return [self._transcribe_safely(audio_file) for audio_file in files]
+
+        print(f"使用 {n_workers} 个进程并行转录 {len(files)} 个文件...")
+
+        results = [None] * len(files)
+        broken = False
+
+        # spawn 启动，确保每个进程干净地初始化 MLX/Metal 和 PyTorch
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_batch_worker,
+                                 initargs=(self._init_args,)) as executor:
+            futures = [executor.submit(_transcribe_in_worker, audio_file) for audio_file in files]
+            for i, future in enumerate(futures):
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    broken = True
+
+        # 工作进程异常退出 (如内存不足被杀) 时，已完成的结果保留，其余文件在当前进程中逐个转录
+        if broken:
+            remaining = [i for i, result in enumerate(results) if result is None]
+            print(f" 工作进程异常退出，在当前进程中转录剩余的 {len(remaining)} 个文件...")
+            for i in remaining:
+                results[i] = self._transcribe_safely(files[i])
+
+        return results
+
+    def _transcribe_safely(self, audio_file: str) -> Dict:
+        """转录单个文件，出错时返回包含 error 的结果"""
+        try:
+            return self.transcribe_meeting(audio_file)
+        except Exception as e:
+            return {"error": str(e)}
+
     def _align_transcription_and_speakers(self,
                                         asr_result: Dict,
                                         diarization_result: Dict) -> Dict:
@@ -140,6 +291,13 @@ class MeetingTranscriber:
         asr_segments = asr_result.get("segments", [])
         speaker_segments = diarization_result.get("segments", [])
 
+        # 数值字段另存一份列数组 (说话人按首次出现编号)，供统计时整列计算
+        speaker_ids = {}
+        segment_speaker_ids = []
+
+        # 说话人片段只排序、建索引一次
+        speaker_index = self._build_speaker_index(speaker_segments)
+
         for asr_seg in asr_segments:
             asr_start = asr_seg["start"]
             asr_end = asr_seg["end"]
@@ -147,28 +305,51 @@ class MeetingTranscriber:
 
             # 找到与ASR时间段重叠最多的说话人
             best_speaker = self._find_best_speaker_overlap(
-                asr_start, asr_end, speaker_segments
+                asr_start, asr_end, speaker_segments, speaker_index
             )
 
-            aligned_segments.append({
-                "start": asr_start,
-                "end": asr_end,
-                "text": asr_text,
-                "speaker": best_speaker,
-                "duration": asr_end - asr_start
-            })
+            aligned_segments.append(AlignedSegment(
+                asr_start, asr_end, asr_text, best_speaker, asr_end - asr_start
+            ))
+            segment_speaker_ids.append(speaker_ids.setdefault(best_speaker, len(speaker_ids)))
 
+        n_segments = len(aligned_segments)
         return {
             "aligned_segments": aligned_segments,
+            "starts": np.fromiter((seg.start for seg in aligned_segments), dtype=np.float64, count=n_segments),
+            "ends": np.fromiter((seg.end for seg in aligned_segments), dtype=np.float64, count=n_segments),
+            "speaker_ids": np.array(segment_speaker_ids, dtype=np.intp),
+            "speaker_names": list(speaker_ids),
             "total_speakers": diarization_result.get("total_speakers", 0),
             "speakers": diarization_result.get("speakers", []),
             "language": asr_result.get("language", "unknown")
         }
 
+    @staticmethod
+    def _build_speaker_index(speaker_segments: List[Dict]) -> Tuple[List[float], List[float], List[float], List[str]]:
+        """
+        按开始时间排序说话人片段，返回 (开始时间, 结束时间, 结束时间前缀最大值, 说话人)
+
+        结束时间前缀最大值单调不减，可用二分查找定位第一个可能与某时间点之后重叠的片段
+        """
+        if not speaker_segments:
+            return [], [], [], []
+
+        starts = np.fromiter((seg["start"] for seg in speaker_segments), dtype=np.float64,
+                             count=len(speaker_segments))
+        order = np.argsort(starts, kind="stable")
+        ends = np.fromiter((speaker_segments[i]["end"] for i in order), dtype=np.float64,
+                           count=len(speaker_segments))
+
+        return (starts[order].tolist(), ends.tolist(),
+                np.maximum.accumulate(ends).tolist(),
+                [speaker_segments[i]["speaker"] for i in order.tolist()])
+
     def _find_best_speaker_overlap(self,
                                  asr_start: float,
                                  asr_end: float,
-                                 speaker_segments: List[Dict]) -> str:
+                                 speaker_segments: List[Dict],
+                                 speaker_index: Optional[Tuple] = None) -> str:
         """
         找到与ASR时间段重叠最多的说话人
 
@@ -176,25 +357,28 @@ class MeetingTranscriber:
             asr_start: ASR片段开始时间
             asr_end: ASR片段结束时间
             speaker_segments: 说话人分离片段列表
+            speaker_index: _build_speaker_index 的结果，None 时在此构建
 
         Returns:
             最匹配的说话人标签
         """
+        if speaker_index is None:
+            speaker_index = self._build_speaker_index(speaker_segments)
+        starts, ends, max_ends, speakers = speaker_index
+
         max_overlap = 0
         best_speaker = "Unknown"
 
-        for speaker_seg in speaker_segments:
-            speaker_start = speaker_seg["start"]
-            speaker_end = speaker_seg["end"]
-
+        # 之前的片段都在 asr_start 前结束，从第一个可能重叠的片段开始，到开始时间超过 asr_end 为止
+        j = bisect_right(max_ends, asr_start)
+        while j < len(starts) and starts[j] < asr_end:
             # 计算重叠时间
-            overlap_start = max(asr_start, speaker_start)
-            overlap_end = min(asr_end, speaker_end)
-            overlap_duration = max(0, overlap_end - overlap_start)
+            overlap_duration = min(asr_end, ends[j]) - max(asr_start, starts[j])
 
             if overlap_duration > max_overlap:
                 max_overlap = overlap_duration
-                best_speaker = speaker_seg["speaker"]
+                best_speaker = speakers[j]
+            j += 1
 
         return best_speaker
 
@@ -209,40 +393,37 @@ class MeetingTranscriber:
             完整的会议摘要
         """
         segments = aligned_result["aligned_segments"]
+        starts = aligned_result["starts"]
+        ends = aligned_result["ends"]
+        speaker_ids = aligned_result["speaker_ids"]
+        speaker_names = aligned_result["speaker_names"]
+
+        # 按说话人统计 (说话人按首次出现的顺序)
+        n_speakers = len(speaker_names)
+        durations = np.bincount(speaker_ids, weights=ends - starts, minlength=n_speakers).tolist()
+        counts = np.bincount(speaker_ids, minlength=n_speakers).tolist()
+        speaker_stats = {
+            speaker: {"total_duration": durations[i], "segment_count": counts[i]}
+            for i, speaker in enumerate(speaker_names)
+        }
 
-        # 按说话人统计
-        speaker_stats = {}
-        speaker_content = {}
-
+        speaker_content = {speaker: [] for speaker in speaker_names}
         for seg in segments:
-            speaker = seg["speaker"]
-            duration = seg["duration"]
-            text = seg["text"]
-
-            if speaker not in speaker_stats:
-                speaker_stats[speaker] = {
-                    "total_duration": 0,
-                    "segment_count": 0
-                }
-                speaker_content[speaker] = []
-
-            speaker_stats[speaker]["total_duration"] += duration
-            speaker_stats[speaker]["segment_count"] += 1
-            speaker_content[speaker].append(text)
+            speaker_content[seg.speaker].append(seg.text)
 
         # 生成时间轴格式的转录
         timeline = []
         for seg in segments:
             timeline.append({
-                "timestamp": self._format_timestamp(seg["start"]),
-                "speaker": seg["speaker"],
-                "text": seg["text"],
-                "start_seconds": seg["start"],
-                "end_seconds": seg["end"]
+                "timestamp": self._format_timestamp(seg.start),
+                "speaker": seg.speaker,
+                "text": seg.text,
+                "start_seconds": seg.start,
+                "end_seconds": seg.end
             })
 
         # 计算总时长
-        total_duration = max([seg["end"] for seg in segments]) if segments else 0
+        total_duration = float(ends.max()) if len(ends) else 0
 
         return {
             "meeting_info": {
@@ -257,7 +438,8 @@ class MeetingTranscriber:
             "segments": segments
         }
 
-    def _format_timestamp(self, seconds: float) -> str:
+    @staticmethod
+    def _format_timestamp(seconds: float) -> str:
         """
         格式化时间戳
 
@@ -271,7 +453,8 @@ class MeetingTranscriber:
         secs = int(seconds % 60)
         return f"{minutes:02d}:{secs:02d}"
 
-    def export_to_json(self, result: Dict, output_file: str):
+    @staticmethod
+    def export_to_json(result: Dict, output_file: str):
         """
         导出结果为JSON格式
 
@@ -280,13 +463,14 @@ class MeetingTranscriber:
             output_file: 输出文件路径
         """
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            with open(output_file, 'wb') as f:
+                f.write(_json_dumps(result))
             print(f" JSON结果已保存到: {output_file}")
         except Exception as e:
             print(f" 保存JSON失败: {str(e)}")
 
-    def export_to_txt(self, result: Dict, output_file: str):
+    @staticmethod
+    def export_to_txt(result: Dict, output_file: str):
         """
         导出结果为可读的文本格式
 
@@ -301,7 +485,7 @@ class MeetingTranscriber:
                 f.write("=" * 60 + "\n")
                 f.write("会议转录结果\n")
                 f.write("=" * 60 + "\n\n")
-                f.write(f"总时长: {self._format_timestamp(info['total_duration'])}\n")
+                f.write(f"总时长: {MeetingTranscriber._format_timestamp(info['total_duration'])}\n")
                 f.write(f"说话人数: {info['total_speakers']}\n")
                 f.write(f"语言: {info['language']}\n")
                 f.write(f"转录时间: {info['transcription_date']}\n\n")
@@ -310,7 +494,7 @@ class MeetingTranscriber:
                 f.write("说话人统计:\n")
                 f.write("-" * 30 + "\n")
                 for speaker, stats in result["speaker_statistics"].items():
-                    duration_str = self._format_timestamp(stats["total_duration"])
+                    duration_str = MeetingTranscriber._format_timestamp(stats["total_duration"])
                     f.write(f"{speaker}: {duration_str} ({stats['segment_count']} 个片段)\n")
                 f.write("\n")
 
@@ -324,7 +508,8 @@ class MeetingTranscriber:
         except Exception as e:
             print(f" 保存文本失败: {str(e)}")
 
-    def export_to_csv(self, result: Dict, output_file: str):
+    @staticmethod
+    def export_to_csv(result: Dict, output_file: str):
         """
         导出结果为CSV格式
 
@@ -333,19 +518,15 @@ class MeetingTranscriber:
             output_file: 输出文件路径
         """
         try:
-            # 创建DataFrame
-            data = []
-            for item in result["timeline"]:
-                data.append({
-                    "时间戳": item["timestamp"],
-                    "开始时间(秒)": item["start_seconds"],
-                    "结束时间(秒)": item["end_seconds"],
-                    "说话人": item["speaker"],
-                    "文本内容": item["text"]
-                })
-
-            df = pd.DataFrame(data)
-            df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            # 逐行写出，不构建中间表格
+            with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(_CSV_HEADER)
+                writer.writerows(
+                    (item["timestamp"], item["start_seconds"], item["end_seconds"],
+                     item["speaker"], item["text"])
+                    for item in result["timeline"]
+                )
             print(f" CSV结果已保存到: {output_file}")
         except Exception as e:
             print(f" 保存CSV失败: {str(e)}")
@@ -6,50 +6,251 @@
 
 import sys
 import os
+import select
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # 处理相对导入和独立运行的兼容性
 try:
-    from .config_manager import ConfigManager
-    from .cross_platform_asr import CrossPlatformASR, check_platform_compatibility
+    from .config_manager import get_shared_config, write_json_file
 except ImportError:
     # 当作为独立脚本运行时，添加父目录到路径
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from srv.config_manager import ConfigManager
-    from srv.cross_platform_asr import CrossPlatformASR, check_platform_compatibility
+    from srv.config_manager import get_shared_config, write_json_file
+
+
+# OpenAI Whisper 内置模型的默认描述
+_OPENAI_SIZE_MAP = {
+    "tiny": "最小模型 (~40MB)",
+    "base": "基础模型 (~150MB)",
+    "small": "小型模型 (~250MB)",
+    "medium": "中型模型 (~770MB)",
+    "large": "大型模型 (~1.5GB)",
+    "large-v2": "大型模型v2 (~1.5GB)",
+    "large-v3": "大型模型v3 (~1.5GB)"
+}
+_OPENAI_BUILTINS = frozenset(_OPENAI_SIZE_MAP)
+
+# 本次会话中已初始化的 ASR 引擎: 模型名称 -> CrossPlatformASR
+_ASR_CACHE = {}
+
+# 后台预加载默认 ASR 引擎: (模型名称, Future)
+_ASR_EXECUTOR = None
+_ASR_PRELOAD = None
+# 已提示过加载结果的预加载任务
+_ASR_PRELOAD_REPORTED = None
+
+
+def _asr_module():
+    """延迟导入 cross_platform_asr，只有用到 ASR 的菜单才加载"""
+    try:
+        from . import cross_platform_asr
+    except ImportError:
+        from srv import cross_platform_asr
+    return cross_platform_asr
+
+
+def check_platform_compatibility():
+    """平台兼容性检查"""
+    return _asr_module().check_platform_compatibility()
+
+
+def get_config():
+    """获取进程内共享的配置管理器 (首次调用时创建)"""
+    return get_shared_config()
+
+
+def _get_asr(model):
+    """获取指定模型的 ASR 引擎，同一会话内复用已初始化的实例"""
+    asr = _ASR_CACHE.get(model)
+    # 实例可能已通过"切换模型"改用其他模型，此时重新创建
+    if asr is None or asr.get_engine_info()["model"] != model:
+        asr = _asr_module().CrossPlatformASR(model)
+        _ASR_CACHE[model] = asr
+    return asr
+
+
+def _default_asr_model():
+    """当前平台默认使用的 Whisper 模型"""
+    engine = "mlx" if _asr_module().get_platform_info()["is_apple_silicon"] else "openai"
+    return get_config().get_default_whisper_model(engine)
+
+
+def _preload_default_asr():
+    """在后台线程中初始化默认模型的 ASR 引擎，与用户操作菜单的时间重叠"""
+    global _ASR_EXECUTOR, _ASR_PRELOAD
+    model = _default_asr_model()
+
+    # 已在加载同一模型且未失败 (也未被切换到其他模型) 时无需重新提交
+    if _ASR_PRELOAD is not None and _ASR_PRELOAD[0] == model:
+        future = _ASR_PRELOAD[1]
+        if not future.done():
+            return
+        if future.exception() is None and future.result().get_engine_info()["model"] == model:
+            return
+
+    if _ASR_EXECUTOR is None:
+        _ASR_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+    _ASR_PRELOAD = (model, _ASR_EXECUTOR.submit(_get_asr, model))
+
+
+def _get_default_asr():
+    """获取默认模型的 ASR 引擎，必要时等待后台加载完成"""
+    _preload_default_asr()
+    return _ASR_PRELOAD[1].result()
+
+
+def _discard_preload():
+    """
+    放弃默认引擎的后台预加载: 尚未开始则取消；已在加载则等待结束，
+    再从缓存中移除该实例，避免与交互式选择的模型同时占用内存
+    """
+    global _ASR_PRELOAD
+    if _ASR_PRELOAD is None:
+        return
+    model, future = _ASR_PRELOAD
+    _ASR_PRELOAD = None
+
+    if future.cancel():
+        return
+    if not future.done():
+        print("等待后台加载的默认引擎结束...")
+    try:
+        asr = future.result()
+    except Exception:
+        return
+    if _ASR_CACHE.get(model) is asr:
+        del _ASR_CACHE[model]
+
+
+def _report_preload():
+    """后台预加载结束时输出一行状态，每个加载任务只提示一次；有输出时返回 True"""
+    global _ASR_PRELOAD_REPORTED
+    if _ASR_PRELOAD is None:
+        return False
+    model, future = _ASR_PRELOAD
+    if not future.done() or future is _ASR_PRELOAD_REPORTED:
+        return False
+
+    _ASR_PRELOAD_REPORTED = future
+    if future.exception() is None:
+        sys.stdout.write(f"\r[后台] 默认 ASR 引擎已就绪: {model}\n")
+    else:
+        sys.stdout.write(f"\r[后台] 默认 ASR 引擎加载失败: {future.exception()}\n")
+    return True
+
+
+def _input_with_poll(prompt, poll_fn, interval=0.2):
+    """
+    读取一行输入，等待期间每隔 interval 秒调用一次 poll_fn
+
+    poll_fn 返回 True 表示输出了内容，此时重新显示提示符。
+    非终端输入时退回普通 input()。
+    """
+    if not sys.stdin.isatty():
+        return input(prompt)
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+
+    if os.name == 'nt':
+        import msvcrt
+        while not msvcrt.kbhit():
+            if poll_fn():
+                sys.stdout.write(prompt)
+                sys.stdout.flush()
+            time.sleep(interval)
+        return input()
+
+    while True:
+        readable, _, _ = select.select([sys.stdin], [], [], interval)
+        if readable:
+            line = sys.stdin.readline()
+            if not line:
+                raise EOFError
+            return line.rstrip("\n")
+        if poll_fn():
+            sys.stdout.write(prompt)
+            sys.stdout.flush()
+
+
+# 终端是否支持 ANSI 清屏 (首次清屏时检测)
+_ANSI_CLEAR = None
+
+
+def _enable_ansi_clear():
+    """检测终端是否支持 ANSI 转义序列，Windows 10+ 上尝试开启 VT 处理"""
+    if not sys.stdout.isatty():
+        return False
+    if os.name != 'nt':
+        return bool(os.environ.get('TERM'))
+
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except Exception:
+        return False
 
 
 def clear_screen():
-    """清屏函数"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """清屏函数 (优先写入 ANSI 转义序列，避免每次启动子进程)"""
+    global _ANSI_CLEAR
+    if _ANSI_CLEAR is None:
+        _ANSI_CLEAR = _enable_ansi_clear()
+
+    if _ANSI_CLEAR:
+        sys.stdout.write("\033[2J\033[H")
+        sys.stdout.flush()
+    else:
+        os.system('cls' if os.name == 'nt' else 'clear')
+
+
+_MAIN_MENU_LINES = (
+    "=" * 50,
+    "         Whisper 模型管理工具",
+    "=" * 50,
+    "",
+    "选择操作:",
+    "1. 查看当前配置",
+    "2. 列出可用模型",
+    "3. 测试ASR引擎",
+    "4. 切换默认模型",
+    "5. 添加自定义模型",
+    "6. 移除自定义模型",
+    "7. 平台兼容性检查",
+    "8. 配置管理",
+    "0. 退出",
+    "",
+)
+
+
+def _write_lines(*lines):
+    """一次性写出多行文本，代替逐行 print"""
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def show_main_menu():
     """显示主菜单"""
     clear_screen()
-    print("=" * 50)
-    print("         Whisper 模型管理工具")
-    print("=" * 50)
-    print()
-    print("选择操作:")
-    print("1. 查看当前配置")
-    print("2. 列出可用模型")
-    print("3. 测试ASR引擎")
-    print("4. 切换默认模型")
-    print("5. 添加自定义模型")
-    print("6. 移除自定义模型")
-    print("7. 平台兼容性检查")
-    print("8. 配置管理")
-    print("0. 退出")
-    print()
+    _write_lines(*_MAIN_MENU_LINES)
 
 
 def show_current_config():
     """显示当前配置"""
-    config = ConfigManager()
+    config = get_config()
     clear_screen()
-    print("=" * 50)
-    print("         当前配置信息")
-    print("=" * 50)
+    _write_lines(
+        "=" * 50,
+        "         当前配置信息",
+        "=" * 50,
+    )
 
     config.show_config_summary()
 
@@ -60,11 +261,13 @@ def show_current_config():
 
 def list_available_models():
     """列出可用模型"""
-    config = ConfigManager()
+    config = get_config()
     clear_screen()
-    print("=" * 50)
-    print("         可用模型列表")
-    print("=" * 50)
+    _write_lines(
+        "=" * 50,
+        "         可用模型列表",
+        "=" * 50,
+    )
 
     for engine in ["mlx", "openai"]:
         print(f"\n{engine.upper()} Whisper 模型:")
@@ -77,46 +280,61 @@ def list_available_models():
             description = config.get_model_description(engine, model)
             is_default = model == default_model
             default_mark = " [默认]" if is_default else ""
-            print(f"{i}. {model}{default_mark}")
-            print(f"   {description}")
-            print()
+            _write_lines(
+                f"{i}. {model}{default_mark}",
+                f"   {description}",
+                "",
+            )
 
 
 def test_asr_engine():
     """测试ASR引擎"""
     clear_screen()
-    print("=" * 50)
-    print("         测试 ASR 引擎")
-    print("=" * 50)
-
-    print("\n选择测试模式:")
-    print("1. 使用默认配置")
-    print("2. 交互式选择模型")
-    print("3. 返回主菜单")
+    _write_lines(
+        "=" * 50,
+        "         测试 ASR 引擎",
+        "=" * 50,
+    )
+
+    # 用户选择期间在后台加载默认引擎
+    _preload_default_asr()
+
+    _write_lines(
+        "\n选择测试模式:",
+        "1. 使用默认配置",
+        "2. 交互式选择模型",
+        "3. 返回主菜单",
+    )
 
     while True:
         try:
-            choice = input("\n请选择 (1-3): ").strip()
+            # 后台加载输出状态时重新显示提示符
+            choice = _input_with_poll("\n请选择 (1-3): ", _report_preload).strip()
 
             if choice == "1":
                 print("\n正在使用默认配置初始化 ASR 引擎...")
                 try:
-                    asr = CrossPlatformASR("auto")
+                    asr = _get_default_asr()
                     _show_engine_info(asr)
-                    return
                 except Exception as e:
                     print(f"初始化失败: {e}")
-                    return
+                # ASR 引擎可能已修改用户偏好，刷新共享配置
+                get_config().reload()
+                return
 
             elif choice == "2":
+                # 改用交互式选择的模型，不再保留后台加载的默认引擎
+                _discard_preload()
+
                 print("\n正在启动交互式模型选择...")
                 try:
-                    asr = CrossPlatformASR("interactive")
+                    asr = _asr_module().CrossPlatformASR("interactive")
+                    _ASR_CACHE[asr.get_engine_info()["model"]] = asr
                     _show_engine_info(asr)
-                    return
                 except Exception as e:
                     print(f"初始化失败: {e}")
-                    return
+                get_config().reload()
+                return
 
             elif choice == "3":
                 return
@@ -133,21 +351,25 @@ def _show_engine_info(asr):
     """显示引擎信息"""
     info = asr.get_engine_info()
 
-    print("\n" + "-" * 40)
-    print("ASR 引擎信息:")
-    print("-" * 40)
-    print(f"平台: {info['platform']['system']} {info['platform']['machine']}")
-    print(f"引擎: {info['engine'].upper()}")
-    print(f"当前模型: {info['model']}")
-    print(f"模型描述: {info['model_description']}")
-    print(f"硬件优化: {'是' if info['optimized'] else '否'}")
-    print(f"可用模型数量: {len(info['available_models'])}")
+    _write_lines(
+        "\n" + "-" * 40,
+        "ASR 引擎信息:",
+        "-" * 40,
+        f"平台: {info['platform']['system']} {info['platform']['machine']}",
+        f"引擎: {info['engine'].upper()}",
+        f"当前模型: {info['model']}",
+        f"模型描述: {info['model_description']}",
+        f"硬件优化: {'是' if info['optimized'] else '否'}",
+        f"可用模型数量: {len(info['available_models'])}",
+    )
 
     # 询问是否查看或切换模型
-    print("\n其他操作:")
-    print("1. 查看所有可用模型")
-    print("2. 切换模型")
-    print("3. 返回")
+    _write_lines(
+        "\n其他操作:",
+        "1. 查看所有可用模型",
+        "2. 切换模型",
+        "3. 返回",
+    )
 
     while True:
         try:
@@ -176,16 +398,17 @@ def _show_engine_info(asr):
 
 def switch_default_model():
     """切换默认模型"""
-    config = ConfigManager()
+    config = get_config()
     clear_screen()
-    print("=" * 50)
-    print("         切换默认模型")
-    print("=" * 50)
-
-    print("\n选择引擎:")
-    print("1. MLX Whisper (Apple Silicon)")
-    print("2. OpenAI Whisper (跨平台)")
-    print("3. 返回主菜单")
+    _write_lines(
+        "=" * 50,
+        "         切换默认模型",
+        "=" * 50,
+        "\n选择引擎:",
+        "1. MLX Whisper (Apple Silicon)",
+        "2. OpenAI Whisper (跨平台)",
+        "3. 返回主菜单",
+    )
 
     while True:
         try:
@@ -216,16 +439,17 @@ def switch_default_model():
 
 def add_custom_model():
     """添加自定义模型"""
-    config = ConfigManager()
+    config = get_config()
     clear_screen()
-    print("=" * 50)
-    print("         添加自定义模型")
-    print("=" * 50)
-
-    print("\n选择引擎类型:")
-    print("1. MLX Whisper (Apple Silicon)")
-    print("2. OpenAI Whisper (跨平台)")
-    print("3. 返回主菜单")
+    _write_lines(
+        "=" * 50,
+        "         添加自定义模型",
+        "=" * 50,
+        "\n选择引擎类型:",
+        "1. MLX Whisper (Apple Silicon)",
+        "2. OpenAI Whisper (跨平台)",
+        "3. 返回主菜单",
+    )
 
     while True:
         try:
@@ -249,14 +473,16 @@ def add_custom_model():
 
 def _add_custom_mlx_model(config):
     """添加自定义 MLX 模型"""
-    print("\n添加自定义 MLX Whisper 模型")
-    print("-" * 40)
-    print("\nMLX 模型通常格式为: mlx-community/whisper-xxx")
-    print("或 HuggingFace 上的其他 MLX 格式模型")
-    print("\n示例:")
-    print("  mlx-community/whisper-tiny")
-    print("  mlx-community/whisper-base")
-    print("  your-username/custom-mlx-whisper")
+    _write_lines(
+        "\n添加自定义 MLX Whisper 模型",
+        "-" * 40,
+        "\nMLX 模型通常格式为: mlx-community/whisper-xxx",
+        "或 HuggingFace 上的其他 MLX 格式模型",
+        "\n示例:",
+        "  mlx-community/whisper-tiny",
+        "  mlx-community/whisper-base",
+        "  your-username/custom-mlx-whisper",
+    )
 
     while True:
         try:
@@ -295,11 +521,13 @@ def _add_custom_mlx_model(config):
 
 def _add_custom_openai_model(config):
     """添加自定义 OpenAI 模型"""
-    print("\n添加自定义 OpenAI Whisper 模型")
-    print("-" * 40)
-    print("\nOpenAI Whisper 支持的模型:")
-    print("  tiny, base, small, medium, large, large-v2, large-v3")
-    print("  或本地模型文件路径")
+    _write_lines(
+        "\n添加自定义 OpenAI Whisper 模型",
+        "-" * 40,
+        "\nOpenAI Whisper 支持的模型:",
+        "  tiny, base, small, medium, large, large-v2, large-v3",
+        "  或本地模型文件路径",
+    )
 
     while True:
         try:
@@ -311,17 +539,8 @@ def _add_custom_openai_model(config):
 
             description = input("请输入模型描述 (可选): ").strip()
             if not description:
-                if model_name in ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"]:
-                    size_map = {
-                        "tiny": "最小模型 (~40MB)",
-                        "base": "基础模型 (~150MB)",
-                        "small": "小型模型 (~250MB)",
-                        "medium": "中型模型 (~770MB)",
-                        "large": "大型模型 (~1.5GB)",
-                        "large-v2": "大型模型v2 (~1.5GB)",
-                        "large-v3": "大型模型v3 (~1.5GB)"
-                    }
-                    description = size_map.get(model_name, f"OpenAI Whisper {model_name} 模型")
+                if model_name in _OPENAI_BUILTINS:
+                    description = _OPENAI_SIZE_MAP.get(model_name, f"OpenAI Whisper {model_name} 模型")
                 else:
                     description = f"用户自定义模型 ({model_name})"
 
@@ -351,33 +570,25 @@ def _add_custom_openai_model(config):
 def _add_model_to_config(config, engine, model_name, description):
     """将模型添加到配置文件"""
     try:
-        import json
-
-        # 读取当前配置
-        if hasattr(config, 'config'):
-            current_config = config.config
-        else:
-            with open(config.config_file, 'r', encoding='utf-8') as f:
-                current_config = json.load(f)
+        # 直接修改配置管理器中已加载的配置，不再重新读取文件
+        current_config = config.config
 
         # 检查模型是否已存在
-        existing_models = current_config.get("whisper_models", {}).get(engine, {}).get("available_models", [])
-        if model_name in existing_models:
+        engine_config = current_config.setdefault("whisper_models", {}).setdefault(
+            engine, {"available_models": [], "descriptions": {}}
+        )
+        if model_name in engine_config.get("available_models", []):
             print(f"模型 {model_name} 已存在")
             return True
 
         # 添加到可用模型列表
-        if engine not in current_config.get("whisper_models", {}):
-            current_config["whisper_models"][engine] = {"available_models": [], "descriptions": {}}
-
-        current_config["whisper_models"][engine]["available_models"].append(model_name)
-        current_config["whisper_models"][engine]["descriptions"][model_name] = description
+        engine_config.setdefault("available_models", []).append(model_name)
+        engine_config.setdefault("descriptions", {})[model_name] = description
 
         # 保存配置文件
-        with open(config.config_file, 'w', encoding='utf-8') as f:
-            json.dump(current_config, f, ensure_ascii=False, indent=2)
+        write_json_file(config.config_file, current_config)
 
-        # 重新加载配置
+        # 重新赋值以刷新配置管理器的派生缓存
         config.config = current_config
 
         return True
@@ -393,45 +604,45 @@ def _test_custom_model(engine, model_name):
     print("-" * 40)
 
     try:
-        try:
-            from .cross_platform_asr import CrossPlatformASR
-        except ImportError:
-            from srv.cross_platform_asr import CrossPlatformASR
-
         print("正在初始化 ASR 引擎...")
-        asr = CrossPlatformASR(model_name)
+        asr = _get_asr(model_name)
 
         info = asr.get_engine_info()
-        print(f"\n引擎信息:")
-        print(f"  平台: {info['platform']['system']} {info['platform']['machine']}")
-        print(f"  引擎: {info['engine'].upper()}")
-        print(f"  模型: {info['model']}")
-        print(f"  描述: {info.get('model_description', '无描述')}")
-        print(f"  硬件优化: {'是' if info['optimized'] else '否'}")
+        _write_lines(
+            f"\n引擎信息:",
+            f"  平台: {info['platform']['system']} {info['platform']['machine']}",
+            f"  引擎: {info['engine'].upper()}",
+            f"  模型: {info['model']}",
+            f"  描述: {info.get('model_description', '无描述')}",
+            f"  硬件优化: {'是' if info['optimized'] else '否'}",
+        )
 
         print(f"\n模型测试成功!")
 
     except Exception as e:
-        print(f"模型测试失败: {e}")
-        print("\n可能的原因:")
-        print("1. 模型名称不正确")
-        print("2. 网络连接问题 (首次下载)")
-        print("3. 平台不兼容 (MLX 仅支持 Apple Silicon)")
-        print("4. 模型不存在或权限问题")
+        _write_lines(
+            f"模型测试失败: {e}",
+            "\n可能的原因:",
+            "1. 模型名称不正确",
+            "2. 网络连接问题 (首次下载)",
+            "3. 平台不兼容 (MLX 仅支持 Apple Silicon)",
+            "4. 模型不存在或权限问题",
+        )
 
 
 def remove_custom_model():
     """移除自定义模型"""
-    config = ConfigManager()
+    config = get_config()
     clear_screen()
-    print("=" * 50)
-    print("         移除自定义模型")
-    print("=" * 50)
-
-    print("\n选择引擎类型:")
-    print("1. MLX Whisper (Apple Silicon)")
-    print("2. OpenAI Whisper (跨平台)")
-    print("3. 返回主菜单")
+    _write_lines(
+        "=" * 50,
+        "         移除自定义模型",
+        "=" * 50,
+        "\n选择引擎类型:",
+        "1. MLX Whisper (Apple Silicon)",
+        "2. OpenAI Whisper (跨平台)",
+        "3. 返回主菜单",
+    )
 
     while True:
         try:
@@ -455,7 +666,7 @@ def remove_custom_model():
 
 def _remove_engine_models(config, engine):
     """移除指定引擎的模型"""
-    models = config.get_available_whisper_models(engine)
+    models = list(config.get_available_whisper_models(engine))
     default_model = config.get_default_whisper_model(engine)
 
     if not models:
@@ -469,9 +680,11 @@ def _remove_engine_models(config, engine):
         description = config.get_model_description(engine, model)
         is_default = model == default_model
         default_mark = " [默认]" if is_default else ""
-        print(f"{i}. {model}{default_mark}")
-        print(f"   {description}")
-        print()
+        _write_lines(
+            f"{i}. {model}{default_mark}",
+            f"   {description}",
+            "",
+        )
 
     while True:
         try:
@@ -480,52 +693,53 @@ def _remove_engine_models(config, engine):
             if not choice:
                 return
 
-            try:
-                choice_idx = int(choice) - 1
-                if 0 <= choice_idx < len(models):
-                    model_to_remove = models[choice_idx]
-
-                    # 检查是否为默认模型
-                    if model_to_remove == default_model:
-                        print(f"\n警告: {model_to_remove} 是当前默认模型")
-                        confirm = input("确定要移除吗? 这可能会影响系统正常运行 (y/n): ").strip().lower()
-                        if confirm not in ['y', 'yes', '是']:
-                            print("取消移除")
-                            continue
-
-                    # 确认移除
-                    confirm = input(f"\n确定要移除模型 {model_to_remove} 吗? (y/n): ").strip().lower()
-                    if confirm in ['y', 'yes', '是']:
-                        success = config.remove_custom_model(engine, model_to_remove)
-                        if success:
-                            print(f"\n模型 {model_to_remove} 已移除")
-
-                            # 如果移除的是默认模型，提示设置新的默认模型
-                            if model_to_remove == default_model:
-                                remaining_models = config.get_available_whisper_models(engine)
-                                if remaining_models:
-                                    print(f"\n请选择新的默认模型:")
-                                    for i, model in enumerate(remaining_models, 1):
-                                        print(f"{i}. {model}")
-
-                                    new_choice = input(f"\n请选择 (1-{len(remaining_models)}): ").strip()
-                                    try:
-                                        new_idx = int(new_choice) - 1
-                                        if 0 <= new_idx < len(remaining_models):
-                                            new_default = remaining_models[new_idx]
-                                            config.set_preferred_model(engine, new_default)
-                                    except ValueError:
-                                        print("无效选择，请手动设置默认模型")
-                        else:
-                            print(f"\n移除模型失败")
-                    else:
-                        print("取消移除")
+            if not choice.isdecimal():
+                print("请输入有效的数字")
+                continue
 
-                    break
+            choice_idx = int(choice) - 1
+            if 0 <= choice_idx < len(models):
+                model_to_remove = models[choice_idx]
+
+                # 检查是否为默认模型
+                if model_to_remove == default_model:
+                    print(f"\n警告: {model_to_remove} 是当前默认模型")
+                    confirm = input("确定要移除吗? 这可能会影响系统正常运行 (y/n): ").strip().lower()
+                    if confirm not in ['y', 'yes', '是']:
+                        print("取消移除")
+                        continue
+
+                # 确认移除
+                confirm = input(f"\n确定要移除模型 {model_to_remove} 吗? (y/n): ").strip().lower()
+                if confirm in ['y', 'yes', '是']:
+                    success = config.remove_custom_model(engine, model_to_remove)
+                    if success:
+                        print(f"\n模型 {model_to_remove} 已移除")
+                        models.remove(model_to_remove)
+
+                        # 如果移除的是默认模型，提示设置新的默认模型
+                        if model_to_remove == default_model:
+                            if models:
+                                print(f"\n请选择新的默认模型:")
+                                for i, model in enumerate(models, 1):
+                                    print(f"{i}. {model}")
+
+                                new_choice = input(f"\n请选择 (1-{len(models)}): ").strip()
+                                if not new_choice.isdecimal():
+                                    print("无效选择，请手动设置默认模型")
+                                else:
+                                    new_idx = int(new_choice) - 1
+                                    if 0 <= new_idx < len(models):
+                                        new_default = models[new_idx]
+                                        config.set_preferred_model(engine, new_default)
+                    else:
+                        print(f"\n移除模型失败")
                 else:
-                    print(f"请输入 1-{len(models)} 之间的数字")
-            except ValueError:
-                print("请输入有效的数字")
+                    print("取消移除")
+
+                break
+            else:
+                print(f"请输入 1-{len(models)} 之间的数字")
 
         except KeyboardInterrupt:
             print("\n取消操作")
@@ -535,15 +749,16 @@ def _remove_engine_models(config, engine):
 def show_config_management():
     """配置管理子菜单"""
     clear_screen()
-    print("=" * 50)
-    print("         配置管理")
-    print("=" * 50)
-
-    print("\n选择操作:")
-    print("1. 查看配置文件位置")
-    print("2. 重置用户配置")
-    print("3. 导出当前配置")
-    print("4. 返回主菜单")
+    _write_lines(
+        "=" * 50,
+        "         配置管理",
+        "=" * 50,
+        "\n选择操作:",
+        "1. 查看配置文件位置",
+        "2. 重置用户配置",
+        "3. 导出当前配置",
+        "4. 返回主菜单",
+    )
 
     while True:
         try:
@@ -574,11 +789,13 @@ def show_config_management():
 
 def _show_config_files():
     """显示配置文件位置"""
-    print("\n配置文件位置:")
-    print("-" * 30)
-    print("主配置文件: models_config.json")
-    print("用户配置文件: user_config.json")
-    print("说明: 用户配置会覆盖主配置中的相同设置")
+    _write_lines(
+        "\n配置文件位置:",
+        "-" * 30,
+        "主配置文件: models_config.json",
+        "用户配置文件: user_config.json",
+        "说明: 用户配置会覆盖主配置中的相同设置",
+    )
 
 
 def _reset_user_config():
@@ -591,6 +808,7 @@ def _reset_user_config():
         if confirm in ['y', 'yes', '是']:
             try:
                 os.remove(user_config_file)
+                get_config().reload()
                 print(f" 用户配置文件已删除，将使用默认配置")
             except Exception as e:
                 print(f" 删除失败: {e}")
@@ -602,9 +820,7 @@ def _reset_user_config():
 
 def _export_config():
     """导出当前配置"""
-    config = ConfigManager()
-    import json
-    from datetime import datetime
+    config = get_config()
 
     export_data = {
         "export_time": datetime.now().isoformat(),
@@ -625,13 +841,25 @@ def _export_config():
     filename = f"config_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, ensure_ascii=False, indent=2)
+        write_json_file(filename, export_data)
         print(f"\n 配置已导出到: {filename}")
     except Exception as e:
         print(f" 导出失败: {e}")
 
 
+# 主菜单选项 -> 处理函数
+_HANDLERS = {
+    "1": show_current_config,
+    "2": list_available_models,
+    "3": test_asr_engine,
+    "4": switch_default_model,
+    "5": add_custom_model,
+    "6": remove_custom_model,
+    "7": check_platform_compatibility,
+    "8": show_config_management,
+}
+
+
 def main():
     """主函数"""
     try:
@@ -639,36 +867,15 @@ def main():
             show_main_menu()
 
             try:
-                choice = input("请选择操作 (0-6): ").strip()
+                choice = _input_with_poll("请选择操作 (0-8): ", _report_preload).strip()
 
                 if choice == "0":
                     print("\n感谢使用模型管理工具!")
                     break
 
-                elif choice == "1":
-                    show_current_config()
-
-                elif choice == "2":
-                    list_available_models()
-
-                elif choice == "3":
-                    test_asr_engine()
-
-                elif choice == "4":
-                    switch_default_model()
-
-                elif choice == "5":
-                    add_custom_model()
-
-                elif choice == "6":
-                    remove_custom_model()
-
-                elif choice == "7":
-                    check_platform_compatibility()
-
-                elif choice == "8":
-                    show_config_management()
-
+                handler = _HANDLERS.get(choice)
+                if handler:
+                    handler()
                 else:
                     print("无效选择，请输入 0-8")
 
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+PyAnnote 常驻进程
+在后台保持 PyAnnote 模型加载，避免每次调用都重新加载模型
+
+启动: python -m srv.pyannote_daemon
+使用: 设置环境变量 PYANNOTE_DAEMON=1 后，PyAnnoteDiarization 会通过本进程执行分离
+
+请求通过 pickle 传输，因此只允许当前用户连接: 认证密钥每次启动随机生成，
+与 Unix socket 一起放在 ~/.cache/voice2code/pyannote_daemon (0700) 下，密钥文件为 0600
+"""
+
+import os
+import secrets
+import stat
+import sys
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+# 常驻进程的私有目录 (仅当前用户可访问)，存放认证密钥和 Unix socket
+_RUNTIME_DIR = os.path.join(os.path.expanduser("~"), ".cache", "voice2code", "pyannote_daemon")
+_AUTHKEY_FILE = os.path.join(_RUNTIME_DIR, "authkey")
+_AUTHKEY_BYTES = 32
+
+
+def _check_private(path: str, is_dir: bool):
+    """确认路径属于当前用户且其他用户无权访问，否则抛出 PermissionError"""
+    if os.name == "nt":
+        return
+    st = os.lstat(path)
+    expected_type = stat.S_ISDIR if is_dir else stat.S_ISREG
+    if not expected_type(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} 不属于当前用户或可被其他用户访问，拒绝使用")
+
+
+def _ensure_runtime_dir():
+    """创建 0700 的私有目录"""
+    os.makedirs(_RUNTIME_DIR, mode=0o700, exist_ok=True)
+    _check_private(_RUNTIME_DIR, is_dir=True)
+
+
+def get_address() -> str:
+    """常驻进程监听地址 (可通过 PYANNOTE_DAEMON_ADDRESS 覆盖)"""
+    address = os.getenv("PYANNOTE_DAEMON_ADDRESS")
+    if address:
+        return address
+    if os.name == "nt":
+        return r"\\.\pipe\pyannote_daemon_" + os.getenv("USERNAME", "user")
+    return os.path.join(_RUNTIME_DIR, "pyannote.sock")
+
+
+def get_authkey() -> bytes:
+    """读取认证密钥；密钥文件不存在或可被其他用户读取时抛出 OSError"""
+    _check_private(_RUNTIME_DIR, is_dir=True)
+    _check_private(_AUTHKEY_FILE, is_dir=False)
+    with open(_AUTHKEY_FILE, "rb") as f:
+        authkey = f.read()
+    if len(authkey) < _AUTHKEY_BYTES:
+        raise PermissionError(f"{_AUTHKEY_FILE} 内容无效")
+    return authkey
+
+
+def _create_authkey():
+    """生成新的随机认证密钥，写入仅当前用户可读写的文件"""
+    _ensure_runtime_dir()
+    tmp_path = _AUTHKEY_FILE + ".tmp"
+    if os.path.lexists(tmp_path):
+        os.unlink(tmp_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        os.write(fd, secrets.token_bytes(_AUTHKEY_BYTES))
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, _AUTHKEY_FILE)
+
+
+def request(message: tuple):
+    """向常驻进程发送一次请求并返回结果，连接或认证失败时抛出 OSError"""
+    try:
+        with Client(get_address(), authkey=get_authkey()) as conn:
+            conn.send(message)
+            return conn.recv()
+    except AuthenticationError as e:
+        raise ConnectionError(f"常驻进程认证失败: {e}") from e
+
+
+def ping() -> bool:
+    """检查常驻进程是否在运行"""
+    try:
+        return request(("ping",)) == "pong"
+    except (OSError, EOFError):
+        return False
+
+
+def _handle(diarizer, message: tuple):
+    """处理一条请求"""
+    command = message[0]
+    if command == "ping":
+        return "pong"
+    if command == "diarize":
+        _, audio_file, max_duration, sample_duration = message
+        return diarizer.diarize(audio_file, max_duration=max_duration,
+                                sample_duration=sample_duration)
+    return {"error": f"未知请求: {command}"}
+
+
+def serve(token: str = None):
+    """加载模型并循环处理请求"""
+    # 常驻进程本身必须在进程内加载模型
+    os.environ.pop("PYANNOTE_DAEMON", None)
+
+    try:
+        from .pyannote_diarization import PyAnnoteDiarization
+        from .token_helper import load_token_from_file
+    except ImportError:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from srv.pyannote_diarization import PyAnnoteDiarization
+        from srv.token_helper import load_token_from_file
+
+    # 未设置环境变量时尝试从 .env 读取 token (已登录 huggingface-cli 时也可不提供)
+    if token is None and not os.getenv("HUGGINGFACE_HUB_TOKEN"):
+        load_token_from_file()
+
+    # 每次启动生成新的随机密钥；私有目录或密钥文件权限不安全时拒绝启动
+    try:
+        _create_authkey()
+        authkey = get_authkey()
+    except OSError as e:
+        print(f" 无法准备认证密钥，拒绝启动: {e}")
+        return
+
+    diarizer = PyAnnoteDiarization(token=token)
+
+    address = get_address()
+    if os.name != "nt" and os.path.lexists(address):
+        os.unlink(address)
+
+    # socket 在创建时即为 0600 (并位于 0700 的私有目录中)，其他用户无法连接
+    old_umask = os.umask(0o177) if os.name != "nt" else None
+    try:
+        listener = Listener(address, authkey=authkey)
+    finally:
+        if old_umask is not None:
+            os.umask(old_umask)
+
+    print(f" PyAnnote 常驻进程已启动，监听: {address}")
+    print(" 按 Ctrl+C 退出")
+
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, AuthenticationError) as e:
+                # 认证失败等单次连接错误不影响服务
+                print(f" 连接失败: {e}")
+                continue
+
+            with conn:
+                try:
+                    message = conn.recv()
+                    conn.send(_handle(diarizer, message))
+                except (EOFError, OSError):
+                    pass
+                except Exception as e:
+                    try:
+                        conn.send({"error": str(e)})
+                    except (EOFError, OSError):
+                        # 客户端已断开
+                        pass
+    except KeyboardInterrupt:
+        print("\n PyAnnote 常驻进程已退出")
+    finally:
+        listener.close()
+
+
+def main():
+    """主函数 (token 不从命令行读取，以免在进程列表中暴露；按环境变量、已登录凭据等常规方式获取)"""
+    serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ PyAnnote 说话人分离模块
 """
 
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import warnings
 
 # 抑制一些不必要的警告
@@ -24,83 +24,218 @@ class PyAnnoteDiarization:
         """
         self.token = token
         self.pipeline = None
-        self._check_and_load_model()
+        self.device = None
+        self.use_daemon = False
 
-    def _check_and_load_model(self):
-        """检查并加载 PyAnnote 模型"""
-        try:
-            from pyannote.audio import Pipeline
+        # 设置 PYANNOTE_DAEMON=1 且常驻进程在运行时，通过常驻进程执行分离
+        if os.getenv("PYANNOTE_DAEMON") == "1":
+            self.use_daemon = self._connect_daemon()
 
-            print("正在加载 PyAnnote 说话人分离模型...")
-            print("注意: 首次使用需要 HuggingFace token，之后完全离线")
+        if not self.use_daemon:
+            self._check_and_load_model()
 
-            # 确定使用的token
-            auth_token = self.token if self.token else True
+    @staticmethod
+    def _connect_daemon() -> bool:
+        """检查 PyAnnote 常驻进程是否可用"""
+        from .pyannote_daemon import get_address, ping
 
-            # 尝试加载模型
-            self.pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=auth_token
-            )
+        if ping():
+            print(f" 使用 PyAnnote 常驻进程: {get_address()}")
+            return True
+        print(" PyAnnote 常驻进程未运行，改为在当前进程加载模型")
+        return False
+
+    def _diarize_via_daemon(self, audio_file: str, max_duration: float = None,
+                            sample_duration: float = None) -> Dict:
+        """通过常驻进程执行说话人分离"""
+        from .pyannote_daemon import request
 
-            print(" PyAnnote 模型加载成功!")
+        try:
+            return request(("diarize", os.path.abspath(audio_file), max_duration, sample_duration))
+        except (OSError, EOFError) as e:
+            # 常驻进程已退出，回退到进程内加载
+            print(f" PyAnnote 常驻进程连接失败，改为在当前进程加载模型: {e}")
+            self.use_daemon = False
+            self._check_and_load_model()
+            return self.diarize(audio_file, max_duration=max_duration,
+                                sample_duration=sample_duration)
 
+    def _check_and_load_model(self):
+        """检查并加载 PyAnnote 模型"""
+        try:
+            from pyannote.audio import Pipeline
         except ImportError:
             raise ImportError(
                 "未安装 pyannote.audio。请运行: pip install pyannote.audio"
             )
-        except Exception as e:
-            error_msg = str(e)
-            if "authenticate" in error_msg.lower() or "token" in error_msg.lower():
-                # 如果没有提供token，尝试提示用户输入
-                if not self.token:
-                    print(" 需要 HuggingFace token")
-                    print("\n有3种方式提供token:")
-                    print("1. 运行 huggingface-cli login 登录")
-                    print("2. 直接传入token: PyAnnoteDiarization(token='your_token')")
-                    print("3. 设置环境变量: export HUGGINGFACE_HUB_TOKEN='your_token'")
-                    print("\n获取token: https://huggingface.co/settings/tokens")
-
-                    # 尝试从环境变量获取
-                    import os
-                    env_token = os.getenv('HUGGINGFACE_HUB_TOKEN')
-                    if env_token:
-                        print(" 找到环境变量中的token，重试加载...")
-                        self.token = env_token
-                        self._check_and_load_model()
-                        return
-
-                    # 提示用户手动输入token
-                    token_input = input("\n请输入你的 HuggingFace token (或按Enter跳过): ").strip()
-                    if token_input:
-                        print(" 使用提供的token，重试加载...")
-                        self.token = token_input
-                        self._check_and_load_model()
-                        return
 
+        print("正在加载 PyAnnote 说话人分离模型...")
+        print("注意: 首次使用需要 HuggingFace token，之后完全离线")
+
+        pipeline, error_msg = self._try_load(Pipeline, self.token)
+
+        # 如果没有提供token，尝试从环境变量或用户输入获取后重试一次
+        if pipeline is None and self._is_token_error(error_msg) and not self.token:
+            retry_token = self._ask_for_token()
+            if retry_token:
+                self.token = retry_token
+                pipeline, error_msg = self._try_load(Pipeline, retry_token)
+
+        if pipeline is None:
+            if self._is_token_error(error_msg):
                 raise RuntimeError(
                     "需要 HuggingFace token。请使用以上任意一种方式提供token"
                 )
-            else:
-                raise RuntimeError(f"加载 PyAnnote 模型失败: {error_msg}")
+            raise RuntimeError(f"加载 PyAnnote 模型失败: {error_msg}")
+
+        self.pipeline = pipeline
+
+        # 有 GPU/MPS 时移到加速设备上推理
+        self.device = self._select_device()
+        if self.device.type != "cpu":
+            self.pipeline.to(self.device)
+        if self.device.type == "cuda":
+            self._compile_models()
+
+        print(f" PyAnnote 模型加载成功! (设备: {self.device.type})")
+
+    def _compile_models(self):
+        """
+        用 torch.compile 编译分割和声纹嵌入模型 (仅 CUDA，设置 PYANNOTE_COMPILE=1 开启)
+
+        滑动窗口推理会反复调用这两个小模型，编译后可减少内核启动开销。
+        pipeline 的批大小和分块数会变化，因此使用 dynamic=True 而不捕获 CUDA Graph；
+        torch.compile 是惰性的，编译后立即用示例输入预热一次，失败时换回原模型。
+        """
+        if os.getenv("PYANNOTE_COMPILE") != "1":
+            return
+
+        import torch
+        if not hasattr(torch, "compile"):
+            return
+
+        targets = (
+            (getattr(self.pipeline, "_segmentation", None), "model"),
+            (getattr(self.pipeline, "_embedding", None), "model_"),
+        )
+        for owner, attr in targets:
+            model = getattr(owner, attr, None)
+            if not isinstance(model, torch.nn.Module):
+                continue
+            try:
+                example = model.example_input_array.to(self.device)
+                compiled = torch.compile(model, dynamic=True)
+                with torch.inference_mode():
+                    compiled(example)
+            except Exception as e:
+                print(f" 模型编译失败，使用普通模式: {e}")
+                continue
+            setattr(owner, attr, compiled)
+
+    @staticmethod
+    def _try_load(pipeline_cls, token: Optional[str]):
+        """
+        尝试加载 pipeline
+
+        Returns:
+            (pipeline, None) 或加载失败时的 (None, 错误信息)
+        """
+        try:
+            # token 为空时使用已登录的token
+            pipeline = pipeline_cls.from_pretrained(
+                "pyannote/speaker-diarization-3.1",
+                use_auth_token=token if token else True
+            )
+            return pipeline, None
+        except Exception as e:
+            return None, str(e)
 
-    def diarize(self, audio_file: str, max_duration: float = None) -> Dict:
+    @staticmethod
+    def _is_token_error(error_msg: Optional[str]) -> bool:
+        """加载失败是否因为缺少或无效的 token"""
+        if not error_msg:
+            return False
+        error_msg = error_msg.lower()
+        return "authenticate" in error_msg or "token" in error_msg
+
+    @staticmethod
+    def _ask_for_token() -> Optional[str]:
+        """提示获取 token 的方式，依次尝试环境变量和用户输入"""
+        print(" 需要 HuggingFace token")
+        print("\n有3种方式提供token:")
+        print("1. 运行 huggingface-cli login 登录")
+        print("2. 直接传入token: PyAnnoteDiarization(token='your_token')")
+        print("3. 设置环境变量: export HUGGINGFACE_HUB_TOKEN='your_token'")
+        print("\n获取token: https://huggingface.co/settings/tokens")
+
+        # 尝试从环境变量获取
+        env_token = os.getenv('HUGGINGFACE_HUB_TOKEN')
+        if env_token:
+            print(" 找到环境变量中的token，重试加载...")
+            return env_token
+
+        # 提示用户手动输入token
+        token_input = input("\n请输入你的 HuggingFace token (或按Enter跳过): ").strip()
+        if token_input:
+            print(" 使用提供的token，重试加载...")
+            return token_input
+        return None
+
+    @staticmethod
+    def _select_device():
+        """选择推理设备: MPS > CUDA > CPU"""
+        import torch
+
+        if getattr(torch.backends, "mps", None) is not None and torch.backends.mps.is_available():
+            return torch.device("mps")
+        if torch.cuda.is_available():
+            return torch.device("cuda")
+        return torch.device("cpu")
+
+    def _run_pipeline(self, audio):
+        """
+        执行 pipeline 推理
+
+        在支持 autocast 的 GPU (CUDA/MPS) 上使用 float16 自动混合精度，其他情况保持 float32；
+        旧版本 torch 没有 is_autocast_available，也不支持 MPS autocast，此时不启用
+        """
+        import contextlib
+        import torch
+
+        is_available = getattr(torch.amp.autocast_mode, "is_autocast_available", None)
+        if (self.device is not None and self.device.type in ("cuda", "mps")
+                and is_available is not None and is_available(self.device.type)):
+            precision = torch.autocast(device_type=self.device.type, dtype=torch.float16)
+        else:
+            precision = contextlib.nullcontext()
+
+        with torch.inference_mode(), precision:
+            return self.pipeline(audio)
+
+    def diarize(self, audio_file: str, max_duration: float = None,
+                sample_duration: float = None) -> Dict:
         """
         执行说话人分离
 
         Args:
             audio_file: 音频文件路径
-            max_duration: 最大处理时长（秒），超过则分段处理
+            max_duration: 超过该时长（秒）时合并相邻的同说话人片段
+            sample_duration: 只分析开头的这么多秒，None表示整个文件
 
         Returns:
             说话人分离结果
         """
+        if self.use_daemon:
+            return self._diarize_via_daemon(audio_file, max_duration, sample_duration)
+
         if self.pipeline is None:
             raise RuntimeError("PyAnnote 模型未正确加载")
 
         try:
             # 检查音频时长
             duration = self._get_audio_duration(audio_file)
+            if sample_duration:
+                duration = min(duration, sample_duration)
             print(f"开始 PyAnnote 说话人分离... (音频时长: {duration:.1f}s)")
 
             # 如果音频过长，给出提示
@@ -108,53 +243,65 @@ class PyAnnoteDiarization:
                 print(" 音频较长，PyAnnote 处理可能需要较长时间...")
                 print(" 建议: 长音频可以考虑使用本地聚类方法获得更快速度")
 
-            # 如果设置了最大时长且音频超长，进行分段处理
-            if max_duration and duration > max_duration:
-                print(f" 音频超过 {max_duration}s，启用分段处理...")
-                return self._diarize_chunked(audio_file, max_duration)
+            # 长音频同样整段送入 pipeline，由其内部滑动窗口处理，
+            # 说话人标签在整段音频内保持一致
+            long_audio = bool(max_duration and duration > max_duration)
+            if long_audio:
+                print(f" 音频超过 {max_duration}s，整段处理后合并相邻片段...")
 
             # 显示进度提示
             import time
             start_time = time.time()
 
-            # 预处理音频以避免张量尺寸问题
-            preprocessed_audio = self._preprocess_audio(audio_file)
+            # 预处理音频以避免张量尺寸问题，直接以内存张量送入 pipeline
+            preprocessed = self._preprocess_audio(audio_file, sample_duration)
+            if preprocessed is None:
+                pipeline_input = audio_file
+            else:
+                import torch
+                y, sr = preprocessed
+                pipeline_input = {"waveform": torch.from_numpy(y).unsqueeze(0), "sample_rate": sr}
 
-            try:
-                # 执行说话人分离
-                diarization_result = self.pipeline(preprocessed_audio)
+            # 执行说话人分离
+            diarization_result = self._run_pipeline(pipeline_input)
+
+            elapsed = time.time() - start_time
+            print(f" PyAnnote 处理完成，耗时: {elapsed:.1f}s")
 
-                elapsed = time.time() - start_time
-                print(f" PyAnnote 处理完成，耗时: {elapsed:.1f}s")
+            # 转换结果格式: 先收集为平行数组，排序后再生成字典
+            import numpy as np
 
-                # 转换结果格式
-                segments = []
-                speakers = set()
+            starts, ends, labels = [], [], []
+            speaker_names = {}
 
-                for turn, _, speaker in diarization_result.itertracks(yield_label=True):
-                    segments.append({
-                        "start": turn.start,
-                        "end": turn.end,
-                        "speaker": f"Speaker_{speaker}"
-                    })
-                    speakers.add(f"Speaker_{speaker}")
+            for turn, _, speaker in diarization_result.itertracks(yield_label=True):
+                starts.append(turn.start)
+                ends.append(turn.end)
+                name = speaker_names.get(speaker)
+                if name is None:
+                    name = speaker_names[speaker] = f"Speaker_{speaker}"
+                labels.append(name)
 
-                # 按时间排序
-                segments.sort(key=lambda x: x["start"])
+            speakers = set(speaker_names.values())
 
-                print(f" PyAnnote 分离完成，检测到 {len(speakers)} 个说话人")
+            # 按时间排序
+            order = np.argsort(np.asarray(starts, dtype=np.float64), kind="stable")
+            segments = [
+                {"start": starts[i], "end": ends[i], "speaker": labels[i]}
+                for i in order.tolist()
+            ]
+            if long_audio:
+                segments = self._merge_speaker_segments(segments)
 
-                return {
-                    "segments": segments,
-                    "speakers": list(speakers),
-                    "total_speakers": len(speakers),
-                    "method": "pyannote",
-                    "processing_time": elapsed
-                }
+            print(f" PyAnnote 分离完成，检测到 {len(speakers)} 个说话人")
 
-            finally:
-                # 清理临时文件
-                self._cleanup_temp_file(preprocessed_audio, audio_file)
+            return {
+                "segments": segments,
+                "speakers": list(speakers),
+                "total_speakers": len(speakers),
+                "method": "pyannote",
+                "processing_time": elapsed
+            }
 
         except Exception as e:
             print(f" PyAnnote 说话人分离失败: {str(e)}")
@@ -167,156 +314,120 @@ class PyAnnoteDiarization:
             }
 
     def _get_audio_duration(self, audio_file: str) -> float:
-        """获取音频时长"""
+        """获取音频时长 (只读取文件头)"""
         try:
-            import librosa
-            y, sr = librosa.load(audio_file, sr=None)
-            return len(y) / sr
+            import soundfile as sf
+            info = sf.info(audio_file)
+            return info.frames / info.samplerate
         except Exception:
+            pass
+
+        # libsndfile 不支持的格式 (如 m4a/mp3) 交给 librosa 读取元数据
+        try:
+            import librosa
+            return librosa.get_duration(path=audio_file)
+        except Exception as e:
+            print(f" 获取音频时长出错: {str(e)}")
             return 0.0
 
-    def _preprocess_audio(self, audio_file: str) -> str:
+    def _preprocess_audio(self, audio_file: str,
+                          sample_duration: float = None) -> Optional[Tuple["np.ndarray", int]]:
         """
         预处理音频以解决 PyAnnote 张量尺寸问题
 
         Args:
             audio_file: 原始音频文件路径
+            sample_duration: 只保留开头的这么多秒，None表示整个文件
 
         Returns:
-            预处理后的音频文件路径
+            (音频数据, 采样率)，预处理失败时返回 None
         """
         try:
-            import librosa
+            import numpy as np
             import soundfile as sf
-            import tempfile
-            import os
 
-            # 加载音频
-            y, sr = librosa.load(audio_file, sr=16000)  # PyAnnote 推荐 16kHz
+            sr = 16000  # PyAnnote 推荐 16kHz
+
+            try:
+                # 用 libsndfile 直接读取，只读需要的帧
+                with sf.SoundFile(audio_file) as f:
+                    orig_sr = f.samplerate
+                    frames = int(sample_duration * orig_sr) if sample_duration else -1
+                    y = f.read(frames=frames, dtype='float32', always_2d=False)
+            except RuntimeError:
+                # libsndfile 不支持的格式 (如 m4a/mp3) 由 librosa 解码，同时完成截取、混音和重采样
+                import librosa
+                y, orig_sr = librosa.load(audio_file, sr=sr, mono=True, duration=sample_duration)
+
+            # 多声道混为单声道
+            if y.ndim == 2:
+                y = y.mean(axis=1)
+
+            # 重采样到 16kHz
+            if orig_sr != sr:
+                import torch
+                import torchaudio
+
+                y = torchaudio.functional.resample(
+                    torch.from_numpy(np.ascontiguousarray(y)), orig_sr, sr,
+                    lowpass_filter_width=64
+                ).numpy()
+
+            y = np.ascontiguousarray(y, dtype=np.float32)
 
             # 确保音频长度是合适的
             # PyAnnote 期望的最小长度约为 0.5 秒
             min_samples = int(0.5 * sr)
             if len(y) < min_samples:
                 # 填充短音频
-                y = librosa.util.fix_length(y, size=min_samples)
-
-            # 标准化音频
-            y = librosa.util.normalize(y)
-
-            # 创建临时文件
-            temp_dir = tempfile.gettempdir()
-            temp_file = os.path.join(temp_dir, f"pyannote_preprocessed_{os.getpid()}.wav")
+                padded = np.zeros(min_samples, dtype=np.float32)
+                padded[:len(y)] = y
+                y = padded
 
-            # 保存预处理后的音频
-            sf.write(temp_file, y, sr)
+            # 标准化音频 (原地缩放，不分配 np.abs 临时数组)
+            peak = max(float(y.max()), -float(y.min()))
+            if peak > 0:
+                np.multiply(y, 1.0 / peak, out=y)
 
-            return temp_file
+            return y, sr
 
         except Exception as e:
             print(f"音频预处理失败，使用原始文件: {str(e)}")
-            return audio_file
-
-    def _cleanup_temp_file(self, temp_file: str, original_file: str):
-        """清理临时文件"""
-        try:
-            import os
-            if temp_file != original_file and os.path.exists(temp_file):
-                os.unlink(temp_file)
-        except Exception:
-            pass  # 忽略清理错误
-
-    def _diarize_chunked(self, audio_file: str, chunk_duration: float) -> Dict:
-        """分段处理长音频"""
-        try:
-            import librosa
-            import soundfile as sf
-            import tempfile
-            import os
-
-            # 加载音频
-            y, sr = librosa.load(audio_file, sr=None)
-            total_duration = len(y) / sr
-            chunk_samples = int(chunk_duration * sr)
-
-            print(f" 分成 {int(total_duration / chunk_duration) + 1} 段处理...")
-
-            all_segments = []
-            chunk_count = 0
-
-            for start_sample in range(0, len(y), chunk_samples):
-                end_sample = min(start_sample + chunk_samples, len(y))
-                chunk_audio = y[start_sample:end_sample]
-                start_time = start_sample / sr
-
-                # 保存临时音频文件
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                    sf.write(tmp_file.name, chunk_audio, sr)
-
-                print(f"处理第 {chunk_count + 1} 段...")
-
-                # 处理这一段
-                chunk_result = self.pipeline(tmp_file.name)
-
-                # 调整时间戳并添加到总结果
-                for turn, _, speaker in chunk_result.itertracks(yield_label=True):
-                    all_segments.append({
-                        "start": turn.start + start_time,
-                        "end": turn.end + start_time,
-                        "speaker": f"Speaker_{speaker}_chunk{chunk_count}"
-                    })
-
-                # 清理临时文件
-                os.unlink(tmp_file.name)
-
-                chunk_count += 1
-
-            # 合并相邻的同说话人片段
-            merged_segments = self._merge_speaker_segments(all_segments)
-            speakers = list(set(seg["speaker"] for seg in merged_segments))
-
-            return {
-                "segments": merged_segments,
-                "speakers": speakers,
-                "total_speakers": len(speakers),
-                "method": "pyannote_chunked"
-            }
-
-        except Exception as e:
-            print(f" 分段处理失败: {e}")
-            # 回退到普通处理
-            return self.diarize(audio_file, max_duration=None)
+            return None
 
     def _merge_speaker_segments(self, segments: List[Dict]) -> List[Dict]:
         """合并相邻的同说话人片段"""
         if not segments:
             return []
 
+        import numpy as np
+
         # 按时间排序
-        segments.sort(key=lambda x: x["start"])
+        starts = np.fromiter((seg["start"] for seg in segments), dtype=np.float64, count=len(segments))
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        ends = np.fromiter((segments[i]["end"] for i in order), dtype=np.float64, count=len(segments))
 
-        merged = [segments[0].copy()]
+        labels = np.array([segments[i]["speaker"] for i in order])
+        _, speaker_ids = np.unique(labels, return_inverse=True)
 
-        for seg in segments[1:]:
-            last_seg = merged[-1]
+        # 说话人变化或间隔不小于2秒处断开，其余与前一片段合并
+        boundary = (speaker_ids[1:] != speaker_ids[:-1]) | (starts[1:] - ends[:-1] >= 2.0)
+        group_starts = np.flatnonzero(np.r_[True, boundary])
+        group_ends = np.r_[group_starts[1:], len(order)] - 1
 
-            # 如果是同一说话人且时间接近，合并
-            if (seg["speaker"].split("_chunk")[0] == last_seg["speaker"].split("_chunk")[0] and
-                seg["start"] - last_seg["end"] < 2.0):  # 2秒内的间隔合并
-                last_seg["end"] = seg["end"]
-                # 统一说话人标签
-                base_speaker = last_seg["speaker"].split("_chunk")[0]
-                last_seg["speaker"] = base_speaker
-            else:
-                # 清理chunk标记
-                seg_copy = seg.copy()
-                seg_copy["speaker"] = seg["speaker"].split("_chunk")[0]
-                merged.append(seg_copy)
+        merged = []
+        for first, last in zip(group_starts.tolist(), group_ends.tolist()):
+            seg_copy = segments[order[first]].copy()
+            seg_copy["end"] = float(ends[last])
+            merged.append(seg_copy)
 
         return merged
 
     def is_available(self) -> bool:
         """检查 PyAnnote 是否可用"""
+        if self.use_daemon:
+            return True
         try:
             import pyannote.audio
             return self.pipeline is not None
@@ -5,11 +5,24 @@ HuggingFace Token 助手
 
 import os
 import sys
+import time
+from typing import Optional, Tuple
 
+# 保存 token 的环境变量名
+_TOKEN_ENV_VAR = 'HUGGINGFACE_HUB_TOKEN'
 
-def get_token_instructions():
-    """获取token的详细说明"""
-    instructions = """
+# token 状态缓存的有效期（秒），过期后重新向 HuggingFace 查询
+_TOKEN_STATUS_TTL = 300
+
+# 最近一次查询结果: (查询时间, 当时的环境变量 token, (来源, 用户名))
+_TOKEN_STATUS_CACHE: Optional[Tuple[float, Optional[str], Tuple[Optional[str], Optional[str]]]] = None
+
+# huggingface_hub.HfApi，首次使用时导入；None 表示尚未导入，False 表示未安装
+_HF_API = None
+
+
+# token 获取和使用说明
+_TOKEN_INSTRUCTIONS = """
 HuggingFace Token 获取和使用指南
 
 1. 获取 Token:
@@ -44,27 +57,91 @@ HuggingFace Token 获取和使用指南
 
 4. 完成后模型会缓存到本地，后续使用完全离线!
 """
-    return instructions
+
+
+def _hf_api_class():
+    """返回 HfApi 类，未安装 huggingface_hub 时返回 None (导入结果只解析一次)"""
+    global _HF_API
+    if _HF_API is None:
+        try:
+            from huggingface_hub import HfApi
+            _HF_API = HfApi
+        except ImportError:
+            _HF_API = False
+    return _HF_API or None
+
+
+def get_token_instructions():
+    """获取token的详细说明"""
+    return _TOKEN_INSTRUCTIONS
+
+
+def print_token_instructions():
+    """输出token的详细说明"""
+    sys.stdout.write(_TOKEN_INSTRUCTIONS)
+
+
+def _get_hf_env_token() -> Optional[str]:
+    """读取环境变量中的 token"""
+    return os.environ.get(_TOKEN_ENV_VAR)
+
+
+def _set_hf_env_token(token: str):
+    """把 token 写入当前进程的环境变量，并使 token 状态缓存失效"""
+    os.environ[_TOKEN_ENV_VAR] = token
+    invalidate_token_cache()
+
+
+def _probe_token_status() -> Tuple[Optional[str], Optional[str]]:
+    """
+    查询 token 来源，返回 ("login", 用户名)、("env", None) 或 (None, None)
+
+    whoami 需要一次网络请求，结果缓存 _TOKEN_STATUS_TTL 秒；环境变量中的 token 变化时重新查询
+    """
+    global _TOKEN_STATUS_CACHE
+
+    env_token = _get_hf_env_token()
+    cached = _TOKEN_STATUS_CACHE
+    if cached and cached[1] == env_token and time.monotonic() - cached[0] < _TOKEN_STATUS_TTL:
+        return cached[2]
+
+    status = (None, None)
+
+    # 检查是否已登录 (未安装 huggingface_hub 时直接检查环境变量)
+    hf_api = _hf_api_class()
+    if hf_api is not None:
+        try:
+            user_info = hf_api().whoami()
+            if user_info:
+                status = ("login", user_info.get('name', 'Unknown'))
+        except Exception:
+            pass
+
+    # 检查环境变量
+    if status[0] is None and env_token:
+        status = ("env", None)
+
+    _TOKEN_STATUS_CACHE = (time.monotonic(), env_token, status)
+    return status
+
+
+def invalidate_token_cache():
+    """清除 token 状态缓存，下次检查时重新查询"""
+    global _TOKEN_STATUS_CACHE
+    _TOKEN_STATUS_CACHE = None
 
 
 def check_token_status():
     """检查token状态"""
     print("检查 HuggingFace Token 状态...")
 
-    # 检查是否已登录
-    try:
-        from huggingface_hub import HfApi
-        api = HfApi()
-        user_info = api.whoami()
-        if user_info:
-            print(f" 已登录用户: {user_info.get('name', 'Unknown')}")
-            return True
-    except Exception:
-        pass
+    source, user_name = _probe_token_status()
 
-    # 检查环境变量
-    env_token = os.getenv('HUGGINGFACE_HUB_TOKEN')
-    if env_token:
+    if source == "login":
+        print(f" 已登录用户: {user_name}")
+        return True
+
+    if source == "env":
         print(" 找到环境变量中的 token")
         return True
 
@@ -81,7 +158,7 @@ def setup_token_interactive():
         print("Token 已配置，可以直接使用 PyAnnote!")
         return True
 
-    print("\n" + get_token_instructions())
+    print_token_instructions()
 
     choice = input("\n选择设置方式 (1: 命令行登录, 2: 环境变量, 3: 跳过): ").strip()
 
@@ -95,7 +172,7 @@ def setup_token_interactive():
         token = input("\n请输入你的 HuggingFace token: ").strip()
         if token:
             # 设置环境变量 (当前会话)
-            os.environ['HUGGINGFACE_HUB_TOKEN'] = token
+            _set_hf_env_token(token)
             print(" Token 已设置为环境变量")
 
             # 提示永久设置
@@ -123,12 +200,24 @@ def setup_token_interactive():
 
 def save_token_to_file(token: str, file_path: str = ".env"):
     """保存token到文件"""
+    payload = f"{_TOKEN_ENV_VAR}={token}\n".encode('utf-8')
+    tmp_path = file_path + '.tmp'
     try:
-        with open(file_path, 'w') as f:
-            f.write(f"HUGGINGFACE_HUB_TOKEN={token}\n")
+        # 先写入仅当前用户可读写的临时文件再原子替换，避免中断时留下不完整的文件
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.write(fd, payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, file_path)
         print(f" Token 已保存到 {file_path}")
         return True
     except Exception as e:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
         print(f" 保存失败: {e}")
         return False
 
@@ -137,12 +226,23 @@ def load_token_from_file(file_path: str = ".env"):
     """从文件加载token"""
     try:
         if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                for line in f:
-                    if line.startswith('HUGGINGFACE_HUB_TOKEN='):
-                        token = line.split('=', 1)[1].strip()
-                        os.environ['HUGGINGFACE_HUB_TOKEN'] = token
-                        return token
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = f.read()
+
+            # 只匹配位于行首的变量名
+            key = f'{_TOKEN_ENV_VAR}='
+            if data.startswith(key):
+                idx = 0
+            else:
+                idx = data.find('\n' + key)
+                if idx >= 0:
+                    idx += 1
+
+            if idx >= 0:
+                line_end = data.find('\n', idx)
+                token = data[idx + len(key):line_end if line_end >= 0 else len(data)].strip()
+                _set_hf_env_token(token)
+                return token
     except Exception as e:
         print(f" 加载失败: {e}")
     return None